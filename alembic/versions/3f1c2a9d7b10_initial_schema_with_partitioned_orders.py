@@ -0,0 +1,224 @@
+"""initial schema with partitioned orders
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2024-05-06 10:12:41.503218
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from apps.market_api.partitions import (
+    PARTITIONED_TABLES,
+    create_default_partition_ddl,
+    monthly_partitions_ddl,
+)
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2a9d7b10"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "group",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "brand",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(length=256), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(op.f("ix_brand_uuid"), "brand", ["uuid"], unique=True)
+    op.create_table(
+        "category",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(length=256), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(op.f("ix_category_uuid"), "category", ["uuid"], unique=True)
+    op.create_table(
+        "user",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=256), nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["group_id"], ["group.id"]),
+        sa.PrimaryKeyConstraint("uuid"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_index(op.f("ix_user_uuid"), "user", ["uuid"], unique=True)
+    op.create_table(
+        "password_history",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_uuid"], ["user.uuid"]),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(
+        op.f("ix_password_history_uuid"), "password_history", ["uuid"], unique=True
+    )
+    op.create_table(
+        "product",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(length=256), nullable=False),
+        sa.Column("sku", sa.String(length=50), nullable=True),
+        sa.Column("brand_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("description", sa.String(length=256), nullable=True),
+        sa.Column("unit", sa.Float(), nullable=True),
+        sa.Column("unit_size", sa.Float(), nullable=True),
+        sa.Column("weight", sa.Float(), nullable=True),
+        sa.Column("price", sa.Float(), nullable=True),
+        sa.Column("category_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["brand_uuid"], ["brand.uuid"]),
+        sa.ForeignKeyConstraint(["category_uuid"], ["category.uuid"]),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(op.f("ix_product_sku"), "product", ["sku"], unique=False)
+    op.create_index(op.f("ix_product_uuid"), "product", ["uuid"], unique=True)
+
+    # partitioned tables: the partition key must be part of every unique
+    # constraint, so order_detail references order by (uuid, created_at)
+    op.create_table(
+        "order",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("delivery_status", sa.String(length=30), nullable=False),
+        sa.Column("total_receipt", sa.Float(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_uuid"], ["user.uuid"]),
+        sa.PrimaryKeyConstraint("uuid", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        op.f("ix_order_delivery_status"), "order", ["delivery_status"], unique=False
+    )
+    op.create_table(
+        "order_detail",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("order_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("order_created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("product_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["order_uuid", "order_created_at"], ["order.uuid", "order.created_at"]
+        ),
+        sa.ForeignKeyConstraint(["product_uuid"], ["product.uuid"]),
+        sa.PrimaryKeyConstraint("uuid", "order_created_at"),
+        postgresql_partition_by="RANGE (order_created_at)",
+    )
+    op.create_index(
+        op.f("ix_order_detail_order_uuid"), "order_detail", ["order_uuid"], unique=False
+    )
+
+    for table in PARTITIONED_TABLES:
+        op.execute(create_default_partition_ddl(table))
+    # the months after these are created by the partitions command (cron),
+    # see apps/market_api/partitions.py
+    for ddl in monthly_partitions_ddl():
+        op.execute(ddl)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_order_detail_order_uuid"), table_name="order_detail")
+    op.drop_table("order_detail")
+    op.drop_index(op.f("ix_order_delivery_status"), table_name="order")
+    op.drop_table("order")
+    op.drop_index(op.f("ix_product_uuid"), table_name="product")
+    op.drop_index(op.f("ix_product_sku"), table_name="product")
+    op.drop_table("product")
+    op.drop_index(op.f("ix_password_history_uuid"), table_name="password_history")
+    op.drop_table("password_history")
+    op.drop_index(op.f("ix_user_uuid"), table_name="user")
+    op.drop_table("user")
+    op.drop_index(op.f("ix_category_uuid"), table_name="category")
+    op.drop_table("category")
+    op.drop_index(op.f("ix_brand_uuid"), table_name="brand")
+    op.drop_table("brand")
+    op.drop_table("group")
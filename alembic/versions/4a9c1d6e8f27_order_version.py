@@ -0,0 +1,28 @@
+"""order version
+
+Revision ID: 4a9c1d6e8f27
+Revises: e7b3f0c81d92
+Create Date: 2024-06-03 10:21:47.309215
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4a9c1d6e8f27"
+down_revision = "e7b3f0c81d92"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # a constant default is stored in the catalog, existing rows aren't rewritten
+    op.add_column(
+        "order", sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+    )
+
+
+def downgrade():
+    op.drop_column("order", "version")
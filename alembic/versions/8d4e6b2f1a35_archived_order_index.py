@@ -0,0 +1,48 @@
+"""archived order index
+
+Revision ID: 8d4e6b2f1a35
+Revises: 3f1c2a9d7b10
+Create Date: 2024-05-13 16:40:08.118734
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "8d4e6b2f1a35"
+down_revision = "3f1c2a9d7b10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "archived_order",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("delivery_status", sa.String(length=30), nullable=False),
+        sa.Column("archive_file", sa.String(length=256), nullable=False),
+        sa.Column("archive_offset", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.create_index(
+        op.f("ix_archived_order_user_uuid"),
+        "archived_order",
+        ["user_uuid"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_archived_order_user_uuid"), table_name="archived_order")
+    op.drop_table("archived_order")
@@ -0,0 +1,55 @@
+"""order status event
+
+Revision ID: a7e4c19b2d60
+Revises: f6a2d8c40b93
+Create Date: 2024-07-01 11:26:53.470918
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "a7e4c19b2d60"
+down_revision = "f6a2d8c40b93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "order_status_event",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("order_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("from_status", sa.String(length=30), nullable=False),
+        sa.Column("to_status", sa.String(length=30), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_order_status_event_order_uuid_created_at",
+        "order_status_event",
+        ["order_uuid", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_order_status_event_created_at",
+        "order_status_event",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_order_status_event_created_at",
+        table_name="order_status_event",
+        postgresql_using="brin",
+    )
+    op.drop_index(
+        "ix_order_status_event_order_uuid_created_at", table_name="order_status_event"
+    )
+    op.drop_table("order_status_event")
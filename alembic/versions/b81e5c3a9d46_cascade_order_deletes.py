@@ -0,0 +1,50 @@
+"""cascade order deletes
+
+Revision ID: b81e5c3a9d46
+Revises: 4a9c1d6e8f27
+Create Date: 2024-06-10 14:52:08.615370
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b81e5c3a9d46"
+down_revision = "4a9c1d6e8f27"
+branch_labels = None
+depends_on = None
+
+# (table, constraint, local columns, referred table, referred columns)
+FOREIGN_KEYS = [
+    (
+        "password_history",
+        "password_history_user_uuid_fkey",
+        ["user_uuid"],
+        "user",
+        ["uuid"],
+    ),
+    ("order", "order_user_uuid_fkey", ["user_uuid"], "user", ["uuid"]),
+    (
+        "order_detail",
+        "order_detail_order_uuid_order_created_at_fkey",
+        ["order_uuid", "order_created_at"],
+        "order",
+        ["uuid", "created_at"],
+    ),
+]
+
+
+def upgrade():
+    for table, name, columns, referred_table, referred_columns in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name, table, referred_table, columns, referred_columns, ondelete="CASCADE"
+        )
+
+
+def downgrade():
+    for table, name, columns, referred_table, referred_columns in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(name, table, referred_table, columns, referred_columns)
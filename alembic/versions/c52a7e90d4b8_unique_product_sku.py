@@ -0,0 +1,42 @@
+"""unique product sku
+
+Revision ID: c52a7e90d4b8
+Revises: 8d4e6b2f1a35
+Create Date: 2024-05-20 09:27:55.640192
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c52a7e90d4b8"
+down_revision = "8d4e6b2f1a35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the index wasn't unique before, keep the sku on the newest product and
+    # suffix the others so they can be told apart and fixed by hand
+    op.execute(
+        """
+        UPDATE product SET sku = left(product.sku, 40) || '-dup' || dup.n
+        FROM (
+            SELECT uuid, row_number() OVER (
+                PARTITION BY sku ORDER BY created_at DESC, uuid
+            ) - 1 AS n
+            FROM product
+            WHERE sku IS NOT NULL
+        ) AS dup
+        WHERE product.uuid = dup.uuid AND dup.n > 0
+        """
+    )
+    op.drop_index("ix_product_sku", table_name="product")
+    op.create_index(op.f("ix_product_sku"), "product", ["sku"], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_product_sku"), table_name="product")
+    op.create_index("ix_product_sku", "product", ["sku"], unique=False)
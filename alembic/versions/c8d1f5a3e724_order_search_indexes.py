@@ -0,0 +1,45 @@
+"""order search indexes
+
+Revision ID: c8d1f5a3e724
+Revises: a7e4c19b2d60
+Create Date: 2024-07-08 09:14:37.602184
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c8d1f5a3e724"
+down_revision = "a7e4c19b2d60"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # created on the partitioned table, Postgres builds one per partition
+    op.create_index(
+        "ix_order_user_uuid_created_at",
+        "order",
+        ["user_uuid", "created_at", "uuid"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_order_created_at", "order", ["created_at", "uuid"], unique=False
+    )
+    op.create_index(
+        "ix_order_active_delivery_status_created_at",
+        "order",
+        ["delivery_status", "created_at", "uuid"],
+        unique=False,
+        postgresql_where=sa.text(
+            "delivery_status IN ('PREPARING_FOR_DELIVERY', 'IN_PROGRESS')"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_order_active_delivery_status_created_at", table_name="order")
+    op.drop_index("ix_order_created_at", table_name="order")
+    op.drop_index("ix_order_user_uuid_created_at", table_name="order")
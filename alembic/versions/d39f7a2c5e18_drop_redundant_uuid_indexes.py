@@ -0,0 +1,30 @@
+"""drop redundant uuid indexes
+
+Revision ID: d39f7a2c5e18
+Revises: b81e5c3a9d46
+Create Date: 2024-06-17 09:38:22.904517
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d39f7a2c5e18"
+down_revision = "b81e5c3a9d46"
+branch_labels = None
+depends_on = None
+
+# unique indexes duplicating the primary key index of each table
+UUID_INDEXES = ["brand", "category", "user", "password_history", "product"]
+
+
+def upgrade():
+    for table in UUID_INDEXES:
+        op.drop_index(op.f(f"ix_{table}_uuid"), table_name=table)
+
+
+def downgrade():
+    for table in UUID_INDEXES:
+        op.create_index(op.f(f"ix_{table}_uuid"), table, ["uuid"], unique=True)
@@ -0,0 +1,56 @@
+"""product catalog read model
+
+Revision ID: e7b3f0c81d92
+Revises: c52a7e90d4b8
+Create Date: 2024-05-27 11:03:19.772015
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "e7b3f0c81d92"
+down_revision = "c52a7e90d4b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "product_catalog",
+        sa.Column("uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(length=256), nullable=False),
+        sa.Column("sku", sa.String(length=50), nullable=True),
+        sa.Column("brand_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("brand_name", sa.String(length=256), nullable=False),
+        sa.Column("description", sa.String(length=256), nullable=True),
+        sa.Column("unit", sa.Float(), nullable=True),
+        sa.Column("unit_size", sa.Float(), nullable=True),
+        sa.Column("weight", sa.Float(), nullable=True),
+        sa.Column("price", sa.Float(), nullable=True),
+        sa.Column("category_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("category_name", sa.String(length=256), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["uuid"], ["product.uuid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("uuid"),
+    )
+    op.execute(
+        """
+        INSERT INTO product_catalog
+        SELECT product.uuid, product.name, product.sku, product.brand_uuid,
+               brand.name, product.description, product.unit, product.unit_size,
+               product.weight, product.price, product.category_uuid,
+               category.name, product.created_at, product.updated_at
+        FROM product
+        JOIN brand ON brand.uuid = product.brand_uuid
+        JOIN category ON category.uuid = product.category_uuid
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("product_catalog")
@@ -0,0 +1,43 @@
+"""product stock
+
+Revision ID: f6a2d8c40b93
+Revises: d39f7a2c5e18
+Create Date: 2024-06-24 16:07:45.128364
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "f6a2d8c40b93"
+down_revision = "d39f7a2c5e18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("product", sa.Column("stock", sa.Integer(), nullable=True))
+    op.add_column(
+        "product",
+        sa.Column("stock_shards", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_check_constraint("product_stock_check", "product", "stock >= 0")
+    op.create_table(
+        "product_stock_shard",
+        sa.Column("product_uuid", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("stock", sa.Integer(), nullable=False),
+        sa.CheckConstraint("stock >= 0", name="product_stock_shard_stock_check"),
+        sa.ForeignKeyConstraint(["product_uuid"], ["product.uuid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_uuid", "shard"),
+    )
+
+
+def downgrade():
+    op.drop_table("product_stock_shard")
+    op.drop_constraint("product_stock_check", "product", type_="check")
+    op.drop_column("product", "stock_shards")
+    op.drop_column("product", "stock")
@@ -1,3 +1,5 @@
+from uuid import UUID
+
 from pydantic import BaseModel
 
 
@@ -7,4 +9,4 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
-    user_uuid: str | None = None
+    user_uuid: UUID | None = None
@@ -2,23 +2,44 @@ from typing import Annotated
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from apps.auth.responses import APICredentialError, APIUserPermissionsError
 from apps.auth.utils import verify_token_access
 from apps.market_api import models
-from database import get_db
+from database import get_db, get_read_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login", scheme_name="JWT")
 
 
+def _get_user(user_uuid, db: Session) -> models.User | None:
+    user = (
+        db.query(models.User)
+        .options(joinedload(models.User.group))
+        .filter(models.User.uuid == user_uuid)
+        .first()
+    )
+    # end the transaction so the connection goes back to the pool while the
+    # endpoint runs
+    db.commit()
+    return user
+
+
 def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
 ) -> models.User:
+    """
+    The user is read like GET endpoints read, from a replica when there are
+    any. The primary is only asked when the replica doesn't know the user,
+    e.g. one created moments ago that hasn't been replicated yet. primary_db
+    doesn't take a connection unless it is used
+    """
     token_data = verify_token_access(token=token)
-    user = (
-        db.query(models.User).filter(models.User.uuid == token_data.user_uuid).first()
-    )
+    user = _get_user(token_data.user_uuid, db=db)
+    if user is None and primary_db.get_bind() is not db.get_bind():
+        user = _get_user(token_data.user_uuid, db=primary_db)
 
     if user is None:
         raise APICredentialError
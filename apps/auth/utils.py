@@ -1,11 +1,10 @@
-import os
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
-from dotenv import load_dotenv
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from apps.auth.responses import APICredentialError
@@ -13,18 +12,20 @@ from apps.auth.schema import TokenData
 from apps.market_api import models
 from apps.market_api.models import User
 from database import get_db
-
-load_dotenv(".env")
+from settings import get_settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login", scheme_name="JWT")
 
-SECRET_KEY = os.environ["OAUTH2_SECRET_KEY"]
-ALGORITHM = os.environ["ALGORITHM"]
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+settings = get_settings()
+SECRET_KEY = settings.oauth2_secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(
+        password.encode("utf-8"), bcrypt.gensalt(rounds=settings.bcrypt_rounds)
+    ).decode()
 
 
 def verify_password(non_hashed_pass, hashed_pass) -> bool:
@@ -62,7 +63,7 @@ def verify_token_access(token: str) -> TokenData:
             raise APICredentialError
 
         token_data = TokenData(user_uuid=user_uuid)
-    except JWTError:
+    except (JWTError, ValidationError):
         raise APICredentialError
 
     return token_data
@@ -0,0 +1,107 @@
+"""
+Cold storage for DELIVERED and CANCELLED orders.
+
+Archived orders are written as gzip compressed JSON Lines. Every batch is a
+separate gzip member appended to the archive file, and the archived_order
+table keeps the byte offset of the member holding each order, so reading one
+order back only decompresses its own batch.
+
+Run periodically (e.g. from cron):
+    python -m apps.market_api.archive --days 90
+"""
+
+import argparse
+import gzip
+import json
+import os
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from settings import get_settings
+
+ARCHIVE_DIR = get_settings().order_archive_dir
+TERMINAL_STATUSES = ("DELIVERED", "CANCELLED")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def archive_file_path(day: date = None, archive_dir: str = None) -> str:
+    day = day or date.today()
+    return os.path.join(archive_dir or ARCHIVE_DIR, f"orders-{day:%Y-%m-%d}.jsonl.gz")
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_batch(path: str, records: list[dict]) -> int:
+    """
+    Append a batch of records to the archive file as one gzip member
+    :param path: str
+    :param records: list[dict]
+    :return: int offset of the gzip member in the file
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lines = "".join(json.dumps(record, default=_default) + "\n" for record in records)
+
+    with open(path, "ab") as f:
+        offset = f.tell()
+        f.write(gzip.compress(lines.encode("utf-8")))
+        f.flush()
+        os.fsync(f.fileno())
+
+    return offset
+
+
+def read_batch(path: str, offset: int):
+    """
+    Yield the records of the gzip member starting at offset
+    :param path: str
+    :param offset: int
+    :return: Iterator[dict]
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = b""
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while not decompressor.eof:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            pending += decompressor.decompress(chunk)
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield json.loads(line)
+
+    if pending:
+        yield json.loads(pending)
+
+
+def find_record(path: str, offset: int, order_uuid: UUID) -> dict | None:
+    for record in read_batch(path, offset):
+        if record["uuid"] == str(order_uuid):
+            return record
+    return None
+
+
+if __name__ == "__main__":
+    from apps.market_api import services
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=args.days)
+    archived = services.archive_orders(
+        cutoff=cutoff, batch_size=args.batch_size, db=next(get_db())
+    )
+    print(f"[OK] {archived} orders archived")
@@ -1,6 +1,16 @@
-from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import StaleDataError
 
+from apps.market_api import providers
 from apps.market_api.exceptions import InvalidDeliveryStatusTransition
+from apps.market_api.models import utcnow
+from apps.monitoring.metrics import ORDER_STATUS_TRANSITIONS
+
+# transitions without side effects, they can be applied to many orders at once
+BULK_TRANSITIONS = {
+    "IN_PROGRESS": "PREPARING_FOR_DELIVERY",
+    "DELIVERED": "IN_PROGRESS",
+}
 
 
 class DeliveryStatus:
@@ -20,12 +30,37 @@ class DeliveryStatus:
         return self.state_name
 
     def _set_status(self, new_status) -> None:
-        """saves the new status in DB"""
-
-        self.order.delivery_status = new_status.state_name
-        self.order.updated_at = func.now()
+        """saves the new status in DB along with the transition event"""
+
+        # an order holds one unit of each of its products unless it's cancelled
+        if new_status.state_name == "CANCELLED":
+            providers.release_order_stock(order_uuid=self.order.uuid, db=self.db)
+        elif self.state_name == "CANCELLED":
+            # ProductOutOfStockError when a product sold out in the meantime
+            providers.reserve_order_stock(order_uuid=self.order.uuid, db=self.db)
+
+        version = self.order.version
+        updated_at = utcnow()
+        updated = providers.set_orders_status(
+            order_uuids=[self.order.uuid],
+            from_status=self.state_name,
+            to_status=new_status.state_name,
+            version=version,
+            updated_at=updated_at,
+            db=self.db,
+        )
+        if not updated:
+            # same as the ORM's version check, the order changed since it was read
+            raise StaleDataError(f"order {self.order.uuid} was updated concurrently")
         self.db.commit()
-        self.db.refresh(self.order)
+
+        set_committed_value(self.order, "delivery_status", new_status.state_name)
+        set_committed_value(self.order, "version", version + 1)
+        set_committed_value(self.order, "updated_at", updated_at)
+
+        ORDER_STATUS_TRANSITIONS.labels(
+            from_status=self.state_name, to_status=new_status.state_name
+        ).inc()
 
 
 class PreparingForDelivery(DeliveryStatus):
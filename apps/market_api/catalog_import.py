@@ -0,0 +1,119 @@
+"""
+Streaming readers for product catalogs.
+
+Supported formats, picked by file extension:
+    .json           a JSON array of products, or an object with a "products" array
+    .jsonl/.ndjson  one product per line
+    .csv            one product per row, with a header row
+
+Records are yielded one at a time so catalogs of any size can be imported:
+    python -m apps.market_api.catalog_import catalog.csv --batch-size 5000
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import IO, Iterator
+
+READ_CHUNK_SIZE = 64 * 1024
+NUMERIC_FIELDS = ("unit", "unit_size", "weight", "price")
+INTEGER_FIELDS = ("stock",)
+
+
+def iter_json_array(f: IO[str], key: str = "products") -> Iterator[dict]:
+    """
+    Yield the objects of a top-level JSON array, or of the array stored under
+    `key` in a top-level object, without loading the whole document
+    :param f: IO[str]
+    :param key: str = "products"
+    :return: Iterator[dict]
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(READ_CHUNK_SIZE).lstrip()
+
+    marker = "[" if buffer.startswith("[") else f'"{key}"'
+    while marker not in buffer or "[" not in buffer[buffer.find(marker) :]:
+        chunk = f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            raise ValueError(f"no '{key}' array found")
+        buffer += chunk
+    buffer = buffer[buffer.index("[", buffer.index(marker)) + 1 :]
+
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if buffer.startswith("]"):
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+
+        yield record
+        buffer = buffer[end:]
+
+
+def iter_json_lines(f: IO[str]) -> Iterator[dict]:
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _csv_value(field: str, value: str):
+    if not value:
+        return None
+    if field in NUMERIC_FIELDS:
+        return float(value)
+    if field in INTEGER_FIELDS:
+        return int(value)
+    return value
+
+
+def iter_csv(f: IO[str]) -> Iterator[dict]:
+    for row in csv.DictReader(f):
+        yield {field: _csv_value(field, value) for field, value in row.items()}
+
+
+def read_catalog(path: str) -> Iterator[dict]:
+    extension = os.path.splitext(path)[1].lower()
+    readers = {
+        ".json": iter_json_array,
+        ".jsonl": iter_json_lines,
+        ".ndjson": iter_json_lines,
+        ".csv": iter_csv,
+    }
+
+    if extension not in readers:
+        raise ValueError(f"unsupported catalog format '{extension}'")
+
+    with open(path, newline="" if extension == ".csv" else None) as f:
+        yield from readers[extension](f)
+
+
+if __name__ == "__main__":
+    from apps.market_api import services
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    stats = services.import_catalog(
+        records=read_catalog(args.path), batch_size=args.batch_size, db=next(get_db())
+    )
+    print(
+        "[OK] {products} products, {brands} new brands, {categories} new "
+        "categories in {seconds:.2f}s ({products_per_second:.0f} products/s)".format(
+            **stats
+        )
+    )
+    if stats["skipped"]:
+        print("[WARN] {} rows skipped".format(stats["skipped"]))
+        for error in stats["errors"]:
+            print("    row {row}: {error}".format(**error))
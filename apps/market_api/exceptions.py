@@ -18,6 +18,22 @@ class InvalidDeliveryStatusTransition(Exception):
     pass
 
 
+class InvalidCursorError(Exception):
+    pass
+
+
+class OrderUpdateConflictError(Exception):
+    pass
+
+
+class ProductNotFoundError(Exception):
+    pass
+
+
+class ProductOutOfStockError(Exception):
+    pass
+
+
 class AddProductsIsNotAvailable(Exception):
     pass
 
@@ -28,3 +44,7 @@ class DeleteProductsIsNotAvailable(Exception):
 
 class CancelOrderIsNotAvailable(Exception):
     pass
+
+
+class DefaultPartitionNotEmptyError(Exception):
+    pass
@@ -1,23 +1,71 @@
+import os
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    DateTime,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 from database import Base
 
 
+ACTIVE_STATUSES = ("PREPARING_FOR_DELIVERY", "IN_PROGRESS")
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def uuid7(*, timestamp: datetime | None = None) -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): a 48 bit Unix timestamp in
+    milliseconds followed by random bits. New keys land at the right edge of
+    the primary key index instead of on random pages
+    :param timestamp: datetime = None, now by default
+    :return: UUID
+    """
+    if timestamp is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    else:
+        timestamp_ms = int(timestamp.timestamp() * 1000)
+
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return uuid.UUID(int=value)
+
+
+def uuid7_time(value: uuid.UUID) -> datetime | None:
+    """
+    Creation time held by a UUIDv7, to the millisecond
+    :param value: UUID
+    :return: datetime, None when the UUID isn't a version 7 one
+    """
+    if value.version != 7:
+        return None
+    return datetime.fromtimestamp((value.int >> 80) / 1000, tz=timezone.utc)
+
+
 class User(Base):
     __tablename__ = "user"
 
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
         default=uuid.uuid4,
     )
     first_name: Mapped[str] = mapped_column(String)
@@ -34,7 +82,11 @@ class User(Base):
         DateTime(timezone=True), nullable=True, server_default=func.now()
     )
 
-    order = relationship("Order", back_populates="user", cascade="all, delete")
+    # orders and their products are deleted by the database (ON DELETE
+    # CASCADE), without loading them
+    order = relationship(
+        "Order", back_populates="user", cascade="all, delete", passive_deletes=True
+    )
     group = relationship("Group", back_populates="user")
 
 
@@ -53,11 +105,11 @@ class PasswordHistory(Base):
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
         default=uuid.uuid4,
     )
-    user_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("user.uuid"))
+    user_uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("user.uuid", ondelete="CASCADE")
+    )
     password: Mapped[str] = mapped_column(String)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -72,12 +124,10 @@ class Product(Base):
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
         default=uuid.uuid4,
     )
     name: Mapped[str] = mapped_column(String(256), nullable=False)
-    sku: Mapped[str] = mapped_column(String(50), nullable=True, index=True)
+    sku: Mapped[str] = mapped_column(String(50), nullable=True, index=True, unique=True)
     brand_uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("brand.uuid")
     )
@@ -89,6 +139,13 @@ class Product(Base):
     category_uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("category.uuid")
     )
+    # units available, NULL when the product's stock isn't tracked
+    stock: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # with shards the stock is split over product_stock_shard rows so that
+    # concurrent reservations of a hot product don't queue on one row lock
+    stock_shards: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -99,6 +156,24 @@ class Product(Base):
     brand = relationship("Brand")
     category = relationship("Category")
 
+    __table_args__ = (CheckConstraint("stock >= 0", name="product_stock_check"),)
+
+
+class ProductStockShard(Base):
+    __tablename__ = "product_stock_shard"
+
+    product_uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("product.uuid", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("stock >= 0", name="product_stock_shard_stock_check"),
+    )
+
 
 class Brand(Base):
     __tablename__ = "brand"
@@ -106,8 +181,6 @@ class Brand(Base):
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
         default=uuid.uuid4,
     )
     name: Mapped[str] = mapped_column(String(256), nullable=False)
@@ -125,8 +198,6 @@ class Category(Base):
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
         default=uuid.uuid4,
     )
     name: Mapped[str] = mapped_column(String(256), nullable=False)
@@ -138,23 +209,84 @@ class Category(Base):
     )
 
 
+class ProductCatalog(Base):
+    """Read model of Product with the brand and category names inline"""
+
+    __tablename__ = "product_catalog"
+
+    uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("product.uuid", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    name: Mapped[str] = mapped_column(String(256), nullable=False)
+    sku: Mapped[str] = mapped_column(String(50), nullable=True)
+    brand_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True))
+    brand_name: Mapped[str] = mapped_column(String(256))
+    description: Mapped[str] = mapped_column(String(256), nullable=True)
+    unit: Mapped[float] = mapped_column(Float, nullable=True)
+    unit_size: Mapped[float] = mapped_column(Float, nullable=True)
+    weight: Mapped[float] = mapped_column(Float, nullable=True)
+    price: Mapped[float] = mapped_column(Float, nullable=True)
+    category_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True))
+    category_name: Mapped[str] = mapped_column(String(256))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    @property
+    def brand(self) -> dict:
+        return {"uuid": self.brand_uuid, "name": self.brand_name}
+
+    @property
+    def category(self) -> dict:
+        return {"uuid": self.category_uuid, "name": self.category_name}
+
+
 class Order(Base):
     __tablename__ = "order"
+    __table_args__ = (
+        # keyset pagination of a user's orders and of all orders
+        Index("ix_order_user_uuid_created_at", "user_uuid", "created_at", "uuid"),
+        Index("ix_order_created_at", "created_at", "uuid"),
+        # dispatch only looks at the orders still moving, a small fraction
+        Index(
+            "ix_order_active_delivery_status_created_at",
+            "delivery_status",
+            "created_at",
+            "uuid",
+            postgresql_where=text(
+                "delivery_status IN ({})".format(
+                    ", ".join(f"'{status}'" for status in ACTIVE_STATUSES)
+                )
+            ),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
+    # partitioned by month on created_at, so the partition key is part of the
+    # table PK and is set client-side. The ORM identity stays on uuid alone,
+    # a UUIDv7 so (created_at, uuid) sorts in insertion order.
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
-        default=uuid.uuid4,
+        default=uuid7,
+    )
+    user_uuid: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("user.uuid", ondelete="CASCADE")
     )
-    user_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("user.uuid"))
     delivery_status: Mapped[str] = mapped_column(
         String(30), default="PREPARING_FOR_DELIVERY", index=True
     )
     total_receipt: Mapped[float] = mapped_column(Float, nullable=True, default=float(0))
+    # bumped by every ORM update, which only applies WHERE version matches
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True),
+        primary_key=True,
+        default=utcnow,
+        server_default=func.now(),
     )
     updated_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True, server_default=func.now()
@@ -162,22 +294,36 @@ class Order(Base):
 
     user = relationship("User", back_populates="order")
     order_detail = relationship(
-        "OrderDetail", back_populates="order", cascade="all, delete"
+        "OrderDetail",
+        back_populates="order",
+        cascade="all, delete",
+        passive_deletes=True,
     )
 
+    __mapper_args__ = {"primary_key": [uuid], "version_id_col": version}
+
 
 class OrderDetail(Base):
     __tablename__ = "order_detail"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_uuid", "order_created_at"],
+            ["order.uuid", "order.created_at"],
+            ondelete="CASCADE",
+        ),
+        # partitioned by the parent order's month so an order and its products
+        # always live in partitions that can be detached together
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
 
     uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        unique=True,
-        default=uuid.uuid4,
+        default=uuid7,
     )
-    order_uuid: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("order.uuid")
+    order_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True), index=True)
+    order_created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
     )
     product_uuid: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("product.uuid")
@@ -189,5 +335,52 @@ class OrderDetail(Base):
         DateTime(timezone=True), nullable=True, server_default=func.now()
     )
 
-    order = relationship("Order", cascade="all, delete")
+    order = relationship("Order", back_populates="order_detail")
     product = relationship("Product")
+
+    __mapper_args__ = {"primary_key": [uuid]}
+
+
+class OrderStatusEvent(Base):
+    """
+    Append-only history of the delivery status transitions. Rows are never
+    updated, so a BRIN index on created_at stays small and exact enough for
+    time range scans while (order_uuid, created_at) serves the timelines
+    """
+
+    __tablename__ = "order_status_event"
+    __table_args__ = (
+        Index(
+            "ix_order_status_event_order_uuid_created_at", "order_uuid", "created_at"
+        ),
+        Index(
+            "ix_order_status_event_created_at",
+            "created_at",
+            postgresql_using="brin",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    # no foreign key, the history outlives archived orders
+    order_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    from_status: Mapped[str] = mapped_column(String(30), nullable=False)
+    to_status: Mapped[str] = mapped_column(String(30), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=utcnow
+    )
+
+
+class ArchivedOrder(Base):
+    __tablename__ = "archived_order"
+
+    uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_uuid: Mapped[UUID] = mapped_column(UUID(as_uuid=True), index=True)
+    delivery_status: Mapped[str] = mapped_column(String(30))
+    archive_file: Mapped[str] = mapped_column(String(256))
+    archive_offset: Mapped[int] = mapped_column(BigInteger)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
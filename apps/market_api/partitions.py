@@ -0,0 +1,190 @@
+"""
+Monthly range partitions for the "order" and "order_detail" tables.
+
+"order" is partitioned on created_at and "order_detail" on order_created_at
+(the parent order's created_at), so the products of an order always live in
+the same month as the order itself. Old months can then be archived with a
+partition detach instead of a mass DELETE.
+
+Run periodically (e.g. from cron) to keep partitions ahead of time:
+    python -m apps.market_api.partitions --months 3
+
+Rows of a month without a partition land in the table's DEFAULT partition.
+Postgres can't create the month's partition while DEFAULT holds rows of
+that month, so creating it is refused until they are moved out by hand.
+"""
+
+import argparse
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from apps.market_api.exceptions import DefaultPartitionNotEmptyError
+
+# parent tables first: detaching must go in the reverse order because
+# order_detail references order
+PARTITIONED_TABLES = ("order", "order_detail")
+PARTITION_KEYS = {"order": "created_at", "order_detail": "order_created_at"}
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    year, month_index = divmod(month.month - 1 + months, 12)
+    return date(month.year + year, month_index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def create_partition_ddl(table: str, month: date) -> str:
+    month = month_start(month)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" '
+        f'PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def create_default_partition_ddl(table: str) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{default_partition_name(table)}" '
+        f'PARTITION OF "{table}" DEFAULT'
+    )
+
+
+def default_partition_rows_sql(table: str, month: date) -> str:
+    month = month_start(month)
+    key = PARTITION_KEYS[table]
+    return (
+        f'SELECT EXISTS (SELECT 1 FROM "{default_partition_name(table)}" '
+        f"WHERE \"{key}\" >= '{month.isoformat()}' "
+        f"AND \"{key}\" < '{add_months(month, 1).isoformat()}')"
+    )
+
+
+def detach_partition_ddl(table: str, month: date) -> str:
+    return (
+        f'ALTER TABLE "{table}" '
+        f'DETACH PARTITION "{partition_name(table, month_start(month))}"'
+    )
+
+
+def monthly_partitions_ddl(start: date = None, months: int = 3) -> list[str]:
+    start = month_start(start or date.today())
+    return [
+        create_partition_ddl(table, add_months(start, offset))
+        for offset in range(months + 1)
+        for table in PARTITIONED_TABLES
+    ]
+
+
+def create_monthly_partitions(
+    connection: Connection, start: date = None, months: int = 3
+) -> list[str]:
+    """
+    Create the monthly partitions of every partitioned table, from the start
+    month (current month by default) up to `months` months ahead. Raises
+    DefaultPartitionNotEmptyError, before creating anything, when a DEFAULT
+    partition already holds rows of a missing month
+    :param connection: Connection
+    :param start: date = None
+    :param months: int = 3
+    :return: list[str] names of the partitions
+    """
+    start = month_start(start or date.today())
+
+    for offset in range(months + 1):
+        month = add_months(start, offset)
+        for table in PARTITIONED_TABLES:
+            check_default_partition(connection, table, month)
+
+    for ddl in monthly_partitions_ddl(start=start, months=months):
+        connection.execute(text(ddl))
+
+    return [
+        partition_name(table, add_months(start, offset))
+        for offset in range(months + 1)
+        for table in PARTITIONED_TABLES
+    ]
+
+
+def check_default_partition(connection: Connection, table: str, month: date) -> None:
+    """
+    :param connection: Connection
+    :param table: str
+    :param month: date
+    :return: None, DefaultPartitionNotEmptyError when the month has no
+    partition yet and the DEFAULT partition holds rows of it
+    """
+    partition, default = partition_name(table, month), default_partition_name(table)
+    exists, has_default = connection.execute(
+        text(
+            "SELECT to_regclass(:partition) IS NOT NULL, to_regclass(:default) IS NOT NULL"
+        ),
+        {"partition": f'"{partition}"', "default": f'"{default}"'},
+    ).one()
+
+    if exists or not has_default:
+        return
+    if connection.execute(text(default_partition_rows_sql(table, month))).scalar():
+        raise DefaultPartitionNotEmptyError(
+            f"{default} holds rows of {month:%Y-%m}, move them out of it "
+            f"before creating {partition}"
+        )
+
+
+def create_default_partitions(connection: Connection) -> None:
+    """
+    Create a DEFAULT partition per table, so rows outside the created months
+    are never rejected
+    :param connection: Connection
+    :return: None
+    """
+    for table in PARTITIONED_TABLES:
+        connection.execute(text(create_default_partition_ddl(table)))
+
+
+def detach_month(connection: Connection, month: date) -> list[str]:
+    """
+    Detach the partitions of a month from every partitioned table. The detached
+    tables keep their data and can be dumped or dropped independently
+    :param connection: Connection
+    :param month: date
+    :return: list[str] names of the detached partitions
+    """
+    detached = []
+    for table in reversed(PARTITIONED_TABLES):
+        connection.execute(text(detach_partition_ddl(table, month)))
+        detached.append(partition_name(table, month_start(month)))
+
+    return detached
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--detach", type=date.fromisoformat, metavar="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.detach:
+            names = detach_month(conn, args.detach)
+            print("[OK] Partitions detached:", ", ".join(names))
+        else:
+            try:
+                names = create_monthly_partitions(conn, months=args.months)
+            except DefaultPartitionNotEmptyError as e:
+                parser.error(str(e))
+            print("[OK] Partitions ready:", ", ".join(names))
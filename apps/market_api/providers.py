@@ -1,22 +1,83 @@
+import random
+from datetime import datetime, timedelta
 from typing import List
 from uuid import UUID
 
 from fastapi import Query
-from sqlalchemy import func
+from sqlalchemy import (
+    and_,
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from apps.market_api.exceptions import (
     EmailAlreadyRegisteredError,
     OrderNotFoundError,
+    ProductNotFoundError,
+    ProductOutOfStockError,
     UserAlreadyExistsError,
     UserNotFoundError,
 )
-from apps.market_api.models import Order, OrderDetail, PasswordHistory, Product, User
+from apps.market_api.models import (
+    ArchivedOrder,
+    Brand,
+    Category,
+    Order,
+    OrderDetail,
+    OrderStatusEvent,
+    PasswordHistory,
+    Product,
+    ProductCatalog,
+    ProductStockShard,
+    User,
+    utcnow,
+    uuid7_time,
+)
+from apps.market_api.total_counts import TotalMode, remember_total, total_count
+from apps.monitoring.tracing import traced
+
+
+# an order's uuid and created_at are both set client-side in the same flush,
+# the slack only keeps the bounds safe from clock oddities
+CREATED_AT_SLACK = timedelta(days=1)
 
 
+def _created_at_range(column, order_uuids: list[UUID]) -> list:
+    """
+    Bounds on an order partition key (order.created_at or
+    order_detail.order_created_at) from the time in UUIDv7 order uuids, so
+    Postgres prunes the monthly partitions a lookup by uuid alone would scan
+    :return: list of conditions, empty when an uuid isn't a UUIDv7 (orders
+    created before uuid7 keys)
+    """
+    times = [uuid7_time(order_uuid) for order_uuid in order_uuids]
+    if not times or None in times:
+        return []
+    return [
+        column >= min(times) - CREATED_AT_SLACK,
+        column <= max(times) + CREATED_AT_SLACK,
+    ]
+
+
+@traced("providers")
 def get_order_by_uuid(order_uuid: UUID, db: Session):
-    order = db.query(Order).filter(Order.uuid == order_uuid).first()
+    order = (
+        db.query(Order)
+        .filter(Order.uuid == order_uuid)
+        .filter(*_created_at_range(Order.created_at, [order_uuid]))
+        .first()
+    )
 
     if not order:
         raise OrderNotFoundError(order_uuid)
@@ -24,31 +85,52 @@ def get_order_by_uuid(order_uuid: UUID, db: Session):
     return order
 
 
+@traced("providers")
 def get_order_products_by_order_uuid(order_uuid: UUID, db: Session):
-    order_products = db.query(OrderDetail).filter(OrderDetail.order_uuid == order_uuid)
+    order_products = db.query(OrderDetail).filter(
+        OrderDetail.order_uuid == order_uuid,
+        *_created_at_range(OrderDetail.order_created_at, [order_uuid]),
+    )
     return order_products
 
 
+@traced("providers")
 def get_products_data_by_order_uuid(order_uuid: UUID, db: Session):
-    order_products = db.query(OrderDetail).filter(OrderDetail.order_uuid == order_uuid)
-    product_uuids = {product.product_uuid for product in order_products}
-    products = db.query(Product).filter(Product.uuid.in_(product_uuids))
+    product_uuids = select(OrderDetail.product_uuid).where(
+        OrderDetail.order_uuid == order_uuid,
+        *_created_at_range(OrderDetail.order_created_at, [order_uuid]),
+    )
+    products = db.query(ProductCatalog).filter(ProductCatalog.uuid.in_(product_uuids))
 
     return products
 
 
+@traced("providers")
 def get_paginated_data_by_query(
     query: Query,
     page_size: int = 10,
     page_num: int = 1,
+    total_mode: TotalMode = "none",
 ):
-    data = [p for p in query.limit(page_size).offset(page_num - 1)]
+    offset = (page_num - 1) * page_size
+    data = [p for p in query.limit(page_size).offset(offset)]
+
+    if total_mode != "none" and (0 < len(data) < page_size or not data and not offset):
+        # the last page, its rows give the exact total for free
+        total, total_is_estimate = offset + len(data), False
+        remember_total(query, total_mode, total)
+    else:
+        total, total_is_estimate = total_count(query, total_mode) or (None, False)
+
     return {
         "count": len(data),
         "data": data,
+        "total": total,
+        "total_is_estimate": total_is_estimate,
     }
 
 
+@traced("providers")
 def update_user_contact_info(
     user_uuid: UUID, db: Session, email: str = None, phone_number: int = None
 ):
@@ -64,7 +146,7 @@ def update_user_contact_info(
         if phone_number:
             user.phone_number = phone_number
 
-        user.updated_at = func.now()
+        user.updated_at = utcnow()
         db.commit()
     except IntegrityError:
         raise EmailAlreadyRegisteredError()
@@ -72,6 +154,7 @@ def update_user_contact_info(
     return user
 
 
+@traced("providers")
 def create_user(
     first_name: str,
     last_name: str,
@@ -100,6 +183,7 @@ def create_user(
     return user
 
 
+@traced("providers")
 def get_user_by_uuid(user_uuid: UUID, db: Session):
     user = db.query(User).filter(User.uuid == user_uuid).first()
 
@@ -108,25 +192,80 @@ def get_user_by_uuid(user_uuid: UUID, db: Session):
     return user
 
 
+@traced("providers")
 def get_products(db: Session, search_text: str = None):
-    products = db.query(Product)
+    products = db.query(ProductCatalog)
 
     if search_text:
-        products = db.query(Product).filter(Product.name.ilike(f"%{search_text}%"))
+        products = products.filter(ProductCatalog.name.ilike(f"%{search_text}%"))
     return products
 
 
+@traced("providers")
 def get_user_orders_by_user_uuid(user_uuid: UUID, db: Session):
-    user_orders = db.query(Order).filter(Order.user_uuid == user_uuid)
+    user_orders = (
+        db.query(Order)
+        .filter(Order.user_uuid == user_uuid)
+        .order_by(Order.created_at.desc(), Order.uuid.desc())
+    )
     return user_orders
 
 
+@traced("providers")
+def search_orders(
+    db: Session,
+    limit: int,
+    delivery_statuses: list[str] = None,
+    created_from: datetime = None,
+    created_to: datetime = None,
+    updated_from: datetime = None,
+    updated_to: datetime = None,
+    email: str = None,
+    min_total: float = None,
+    after: tuple[datetime, UUID] = None,
+):
+    """
+    Orders matching every given filter, newest first. `after` is the
+    (created_at, uuid) of the last order of the previous page
+    """
+    filters = []
+    if delivery_statuses:
+        filters.append(Order.delivery_status.in_(delivery_statuses))
+    if created_from:
+        filters.append(Order.created_at >= created_from)
+    if created_to:
+        filters.append(Order.created_at < created_to)
+    if updated_from:
+        filters.append(Order.updated_at >= updated_from)
+    if updated_to:
+        filters.append(Order.updated_at < updated_to)
+    if email:
+        filters.append(
+            Order.user_uuid.in_(select(User.uuid).where(User.email == email))
+        )
+    if min_total is not None:
+        filters.append(Order.total_receipt >= min_total)
+    if after:
+        filters.append(tuple_(Order.created_at, Order.uuid) < after)
+
+    orders = (
+        db.query(Order)
+        .options(joinedload(Order.user))
+        .filter(*filters)
+        .order_by(Order.created_at.desc(), Order.uuid.desc())
+        .limit(limit)
+    )
+    return orders.all()
+
+
+@traced("providers")
 def create_user_order_with_products(
     user_uuid: UUID, product_uuids: List[UUID], db: Session
 ):
-    products = db.query(Product).filter(Product.uuid.in_(product_uuids))
+    products = db.query(Product).filter(Product.uuid.in_(product_uuids)).all()
     product_uuids_list = [product.uuid for product in products]
     total_receipt = sum([product.price for product in products])
+    reserve_stock(products=products, db=db)
 
     order = Order(user_uuid=user_uuid, total_receipt=total_receipt)
     db.add(order)
@@ -134,7 +273,13 @@ def create_user_order_with_products(
 
     bulk_list = []
     for product_uuid in product_uuids_list:
-        bulk_list.append(OrderDetail(order_uuid=order.uuid, product_uuid=product_uuid))
+        bulk_list.append(
+            OrderDetail(
+                order_uuid=order.uuid,
+                order_created_at=order.created_at,
+                product_uuid=product_uuid,
+            )
+        )
 
     db.bulk_save_objects(bulk_list)
     db.commit()
@@ -142,18 +287,496 @@ def create_user_order_with_products(
     return order
 
 
+@traced("providers")
 def get_products_by_uuids(product_uuids: list[UUID], db: Session):
     products = db.query(Product).filter(Product.uuid.in_(product_uuids))
     return products
 
 
+@traced("providers")
 def delete_order_products(order_uuid: UUID, product_uuids: list[UUID], db: Session):
-    order_detail = (
-        db.query(OrderDetail)
-        .filter(OrderDetail.order_uuid == order_uuid)
-        .filter(OrderDetail.product_uuid.in_(product_uuids))
+    """deletes the products from the order, returns the uuids actually removed"""
+    deleted = db.execute(
+        delete(OrderDetail)
+        .where(OrderDetail.order_uuid == order_uuid)
+        .where(*_created_at_range(OrderDetail.order_created_at, [order_uuid]))
+        .where(OrderDetail.product_uuid.in_(product_uuids))
+        .returning(OrderDetail.product_uuid),
+        execution_options={"synchronize_session": False},
     )
-    db.delete(order_detail)
-    db.commit()
 
-    return order_detail
+    return deleted.scalars().all()
+
+
+def _take_one(product: Product, db: Session) -> bool:
+    """conditional decrement, the row is only locked when a unit is left"""
+    if not product.stock_shards:
+        taken = db.execute(
+            update(Product)
+            .where(Product.uuid == product.uuid, Product.stock >= 1)
+            .values(stock=Product.stock - 1),
+            execution_options={"synchronize_session": False},
+        )
+        return taken.rowcount == 1
+
+    # start at a random shard so concurrent orders spread over the rows
+    start = random.randrange(product.stock_shards)
+    for i in range(product.stock_shards):
+        taken = db.execute(
+            update(ProductStockShard)
+            .where(
+                ProductStockShard.product_uuid == product.uuid,
+                ProductStockShard.shard == (start + i) % product.stock_shards,
+                ProductStockShard.stock >= 1,
+            )
+            .values(stock=ProductStockShard.stock - 1),
+            execution_options={"synchronize_session": False},
+        )
+        if taken.rowcount == 1:
+            return True
+    return False
+
+
+@traced("providers")
+def reserve_stock(products: list[Product], db: Session):
+    """
+    Take one unit of every product whose stock is tracked. Products are locked
+    in uuid order so two orders can't deadlock on each other. When a product
+    is sold out the transaction is rolled back
+    """
+    tracked = [p for p in products if p.stock is not None or p.stock_shards]
+    out_of_stock = [
+        product.uuid
+        for product in sorted(tracked, key=lambda p: p.uuid)
+        if not _take_one(product, db)
+    ]
+
+    if out_of_stock:
+        db.rollback()
+        raise ProductOutOfStockError(out_of_stock)
+
+
+@traced("providers")
+def release_stock(product_uuids: list[UUID], db: Session):
+    """
+    puts back one unit of every product, untracked products are skipped. One
+    statement for the products with a single counter, one per sharded product
+    """
+    if not product_uuids:
+        return
+
+    db.execute(
+        update(Product)
+        .where(
+            Product.uuid.in_(product_uuids),
+            Product.stock.isnot(None),
+            Product.stock_shards == 0,
+        )
+        .values(stock=Product.stock + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+    sharded = (
+        db.query(Product.uuid, Product.stock_shards)
+        .filter(Product.uuid.in_(product_uuids), Product.stock_shards > 0)
+        .order_by(Product.uuid)
+    )
+    for product_uuid, stock_shards in sharded:
+        db.execute(
+            update(ProductStockShard)
+            .where(
+                ProductStockShard.product_uuid == product_uuid,
+                ProductStockShard.shard == random.randrange(stock_shards),
+            )
+            .values(stock=ProductStockShard.stock + 1),
+            execution_options={"synchronize_session": False},
+        )
+
+
+@traced("providers")
+def reserve_order_stock(order_uuid: UUID, db: Session):
+    product_uuids = select(OrderDetail.product_uuid).where(
+        OrderDetail.order_uuid == order_uuid,
+        *_created_at_range(OrderDetail.order_created_at, [order_uuid]),
+    )
+    products = db.query(Product).filter(Product.uuid.in_(product_uuids)).all()
+    reserve_stock(products=products, db=db)
+
+
+@traced("providers")
+def release_order_stock(order_uuid: UUID, db: Session):
+    product_uuids = select(OrderDetail.product_uuid).where(
+        OrderDetail.order_uuid == order_uuid,
+        *_created_at_range(OrderDetail.order_created_at, [order_uuid]),
+    )
+    release_stock(product_uuids=db.scalars(product_uuids).all(), db=db)
+
+
+@traced("providers")
+def set_product_stock(
+    sku: str, db: Session, stock: int = None, stock_shards: int = None
+) -> Product:
+    """
+    Set the stock and/or the number of stock shards of a product. The units
+    left are kept when only the shards change
+    """
+    product = db.query(Product).filter(Product.sku == sku).with_for_update().first()
+
+    if not product:
+        raise ProductNotFoundError(sku)
+
+    untracked = product.stock is None and not product.stock_shards
+    if stock_shards and stock is None and untracked:
+        # nothing to spread over the shards, every reservation would fail
+        raise ValueError(f"{sku} stock isn't tracked, set a stock to shard it")
+
+    if stock is None and product.stock_shards:
+        # FOR UPDATE can't be used with an aggregate, the shards are summed here
+        shard_stocks = db.scalars(
+            select(ProductStockShard.stock)
+            .where(ProductStockShard.product_uuid == product.uuid)
+            .with_for_update()
+        )
+        stock = sum(shard_stocks)
+    elif stock is None:
+        stock = product.stock
+
+    db.execute(
+        delete(ProductStockShard).where(ProductStockShard.product_uuid == product.uuid),
+        execution_options={"synchronize_session": False},
+    )
+    product.stock = stock
+    if stock_shards is not None:
+        product.stock_shards = stock_shards
+    product.updated_at = utcnow()
+    db.flush()
+
+    spread_stock_over_shards(skus=[sku], db=db)
+    return product
+
+
+@traced("providers")
+def spread_stock_over_shards(db: Session, skus: list[str] = None):
+    """
+    Move the stock of sharded products into their product_stock_shard rows,
+    split as evenly as possible, and clear product.stock which sharded
+    products don't use. Only products with a stock to move are touched
+    """
+    products = db.query(Product).filter(
+        Product.stock_shards > 0, Product.stock.isnot(None)
+    )
+    if skus is not None:
+        products = products.filter(Product.sku.in_(skus))
+    products = products.all()
+
+    if not products:
+        return
+
+    product_uuids = [product.uuid for product in products]
+    db.execute(
+        delete(ProductStockShard).where(
+            ProductStockShard.product_uuid.in_(product_uuids)
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.bulk_insert_mappings(
+        ProductStockShard,
+        [
+            {
+                "product_uuid": product.uuid,
+                "shard": shard,
+                "stock": product.stock // product.stock_shards
+                + (shard < product.stock % product.stock_shards),
+            }
+            for product in products
+            for shard in range(product.stock_shards)
+        ],
+    )
+    for product in products:
+        product.stock = None
+    db.flush()
+
+
+@traced("providers")
+def create_order_status_events(events: list[dict], db: Session):
+    """one multi-row INSERT per 1000 events (batched by the driver)"""
+    db.execute(insert(OrderStatusEvent.__table__), events)
+
+
+@traced("providers")
+def set_orders_status(
+    order_uuids: list[UUID],
+    from_status: str,
+    to_status: str,
+    db: Session,
+    version: int = None,
+    updated_at: datetime = None,
+) -> list[UUID]:
+    """
+    Move the orders still in from_status (and at `version` when given) to
+    to_status and append the transitions to order_status_event. On Postgres
+    both are written by one statement, a data-modifying CTE
+    :return: list[UUID] of the orders that changed
+    """
+    now = updated_at or utcnow()
+    conditions = [
+        Order.uuid.in_(order_uuids),
+        *_created_at_range(Order.created_at, order_uuids),
+        Order.delivery_status == from_status,
+    ]
+    if version is not None:
+        conditions.append(Order.version == version)
+
+    updated = (
+        update(Order.__table__)
+        .where(*conditions)
+        .values(delivery_status=to_status, updated_at=now, version=Order.version + 1)
+        .returning(Order.uuid)
+    )
+
+    if db.get_bind().dialect.name != "postgresql":
+        updated_uuids = db.scalars(updated).all()
+        if updated_uuids:
+            create_order_status_events(
+                events=[
+                    {
+                        "order_uuid": order_uuid,
+                        "from_status": from_status,
+                        "to_status": to_status,
+                        "created_at": now,
+                    }
+                    for order_uuid in updated_uuids
+                ],
+                db=db,
+            )
+        return updated_uuids
+
+    updated = updated.cte("updated")
+    events = (
+        insert(OrderStatusEvent.__table__)
+        .from_select(
+            ["order_uuid", "from_status", "to_status", "created_at"],
+            select(
+                updated.c.uuid,
+                literal(from_status, OrderStatusEvent.from_status.type),
+                literal(to_status, OrderStatusEvent.to_status.type),
+                literal(now, OrderStatusEvent.created_at.type),
+            ),
+        )
+        .returning(OrderStatusEvent.order_uuid)
+    )
+    return db.scalars(events).all()
+
+
+@traced("providers")
+def get_order_status_events(order_uuid: UUID, db: Session):
+    events = (
+        db.query(OrderStatusEvent)
+        .filter(OrderStatusEvent.order_uuid == order_uuid)
+        .order_by(OrderStatusEvent.created_at, OrderStatusEvent.id)
+    )
+    return events.all()
+
+
+@traced("providers")
+def get_archivable_orders(
+    cutoff: datetime, delivery_statuses: tuple[str, ...], limit: int, db: Session
+):
+    orders = (
+        db.query(Order)
+        .options(joinedload(Order.user))
+        .filter(Order.delivery_status.in_(delivery_statuses))
+        .filter(Order.created_at < cutoff)
+        .order_by(Order.created_at)
+        .limit(limit)
+    )
+    return orders.all()
+
+
+@traced("providers")
+def get_products_by_order_uuids(order_uuids: list[UUID], db: Session):
+    order_products = (
+        db.query(OrderDetail.order_uuid, Product)
+        .join(Product, OrderDetail.product_uuid == Product.uuid)
+        .filter(
+            OrderDetail.order_uuid.in_(order_uuids),
+            *_created_at_range(OrderDetail.order_created_at, order_uuids),
+        )
+    )
+    return order_products
+
+
+@traced("providers")
+def create_archived_orders(archived_orders: list[dict], db: Session):
+    db.bulk_insert_mappings(ArchivedOrder, archived_orders)
+
+
+@traced("providers")
+def delete_orders_by_uuids(order_uuids: list[UUID], db: Session):
+    db.query(OrderDetail).filter(
+        OrderDetail.order_uuid.in_(order_uuids),
+        *_created_at_range(OrderDetail.order_created_at, order_uuids),
+    ).delete(synchronize_session=False)
+    db.query(Order).filter(
+        Order.uuid.in_(order_uuids), *_created_at_range(Order.created_at, order_uuids)
+    ).delete(synchronize_session=False)
+
+
+@traced("providers")
+def get_archived_order_by_uuid(order_uuid: UUID, db: Session):
+    archived_order = (
+        db.query(ArchivedOrder).filter(ArchivedOrder.uuid == order_uuid).first()
+    )
+
+    if not archived_order:
+        raise OrderNotFoundError(order_uuid)
+
+    return archived_order
+
+
+@traced("providers")
+def get_orders_export_rows(db: Session, yield_per: int = 1000):
+    rows = (
+        db.query(
+            Order.uuid,
+            Order.delivery_status,
+            Order.total_receipt,
+            Order.created_at,
+            Order.updated_at,
+            User.uuid.label("user_uuid"),
+            User.email,
+            User.first_name,
+            User.last_name,
+            Product.uuid.label("product_uuid"),
+            Product.sku,
+            Product.name.label("product_name"),
+            Product.price,
+        )
+        .join(User, Order.user_uuid == User.uuid)
+        .outerjoin(
+            OrderDetail,
+            and_(
+                OrderDetail.order_uuid == Order.uuid,
+                OrderDetail.order_created_at == Order.created_at,
+            ),
+        )
+        .outerjoin(Product, OrderDetail.product_uuid == Product.uuid)
+        .order_by(Order.created_at, Order.uuid)
+        .execution_options(stream_results=True, yield_per=yield_per)
+    )
+    return rows
+
+
+@traced("providers")
+def get_brand_uuids_by_name(db: Session) -> dict:
+    return {name: uuid for uuid, name in db.query(Brand.uuid, Brand.name)}
+
+
+@traced("providers")
+def get_category_uuids_by_name(db: Session) -> dict:
+    return {name: uuid for uuid, name in db.query(Category.uuid, Category.name)}
+
+
+@traced("providers")
+def create_brands(brands: list[dict], db: Session):
+    db.bulk_insert_mappings(Brand, brands)
+
+
+@traced("providers")
+def create_categories(categories: list[dict], db: Session):
+    db.bulk_insert_mappings(Category, categories)
+
+
+def _insert(db: Session, table):
+    dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+    return dialect.insert(table)
+
+
+@traced("providers")
+def upsert_products_by_sku(products: list[dict], db: Session):
+    """multi-row INSERT ... ON CONFLICT (sku) DO UPDATE, batched by the driver"""
+    statement = _insert(db, Product.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={
+            column: statement.excluded[column]
+            for column in products[0]
+            if column not in ("uuid", "sku", "stock")
+        }
+        # a feed without stock levels keeps the current ones
+        | {"stock": func.coalesce(statement.excluded.stock, Product.stock)}
+        | {"updated_at": func.now()},
+    )
+    db.execute(statement, products)
+
+
+@traced("providers")
+def refresh_product_catalog(
+    db: Session,
+    product_uuids: list[UUID] = None,
+    skus: list[str] = None,
+    brand_uuids: list[UUID] = None,
+    category_uuids: list[UUID] = None,
+):
+    """
+    Upsert the product_catalog rows of the given products, brands or
+    categories with one INSERT ... SELECT. Without filters every row is rebuilt
+    """
+    filters = [
+        column.in_(values)
+        for column, values in (
+            (Product.uuid, product_uuids),
+            (Product.sku, skus),
+            (Product.brand_uuid, brand_uuids),
+            (Product.category_uuid, category_uuids),
+        )
+        if values is not None
+    ]
+    products = (
+        select(
+            Product.uuid,
+            Product.name,
+            Product.sku,
+            Product.brand_uuid,
+            Brand.name,
+            Product.description,
+            Product.unit,
+            Product.unit_size,
+            Product.weight,
+            Product.price,
+            Product.category_uuid,
+            Category.name,
+            Product.created_at,
+            Product.updated_at,
+        )
+        .join(Brand, Product.brand_uuid == Brand.uuid)
+        .join(Category, Product.category_uuid == Category.uuid)
+        .where(or_(*filters) if filters else true())
+    )
+    columns = [column.name for column in ProductCatalog.__table__.columns]
+
+    statement = _insert(db, ProductCatalog.__table__).from_select(columns, products)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProductCatalog.uuid],
+        set_={
+            column: statement.excluded[column] for column in columns if column != "uuid"
+        },
+    )
+    db.execute(statement)
+
+
+@event.listens_for(Session, "after_flush")
+def refresh_product_catalog_after_flush(session: Session, flush_context):
+    """keeps product_catalog in sync with catalog writes done through the ORM"""
+    changed = {Product: set(), Brand: set(), Category: set()}
+    for instance in session.new | session.dirty:
+        if type(instance) in changed:
+            changed[type(instance)].add(instance.uuid)
+
+    if any(changed.values()):
+        refresh_product_catalog(
+            db=session,
+            product_uuids=list(changed[Product]),
+            brand_uuids=list(changed[Brand]),
+            category_uuids=list(changed[Category]),
+        )
@@ -21,6 +21,21 @@ class APIInvalidDeliveryStatusTransition(BaseErrorResponse):
     error = "API_INVALID_DELIVERY_STATUS_TRANSITION"
 
 
+class APIOrderUpdateConflictError(BaseErrorResponse):
+    status_code = status.HTTP_409_CONFLICT
+    error = "API_ORDER_UPDATE_CONFLICT"
+
+
+class APIInvalidCursorError(BaseErrorResponse):
+    status_code = status.HTTP_400_BAD_REQUEST
+    error = "API_INVALID_CURSOR"
+
+
+class APIProductOutOfStockError(BaseErrorResponse):
+    status_code = status.HTTP_409_CONFLICT
+    error = "API_PRODUCT_OUT_OF_STOCK"
+
+
 class APIDeleteProductsIsNotAvailableError(BaseErrorResponse):
     status_code = status.HTTP_405_METHOD_NOT_ALLOWED
     error = "API_PRODUCTS_CANNOT_BE_DELETED"
@@ -96,6 +96,18 @@ class StatusSchema(BaseModel):
         return v.title()
 
 
+class BulkStatusSchema(StatusSchema):
+    order_uuids: list[UUID]
+
+
+class OrderStatusEventSchema(BaseModel):
+    from_status: str
+    to_status: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class AddOrderProductsSchema(BaseModel):
     product_uuids: list[UUID]
 
@@ -127,3 +139,10 @@ class UpdateUserContactInfoSchema(BaseModel):
 class PaginatedResponse(BaseModel, Generic[M]):
     count: int
     data: List[M]
+    # all the matching rows, when requested (see total_counts)
+    total: int | None = None
+    total_is_estimate: bool = False
+
+
+class KeysetPaginatedResponse(PaginatedResponse[M], Generic[M]):
+    next_cursor: str | None = None
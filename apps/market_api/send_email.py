@@ -1,39 +1,45 @@
-import os
+import time
+from functools import lru_cache
 from uuid import UUID
 
-from dotenv import load_dotenv
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
+from apps.monitoring.metrics import EMAIL_SEND_LATENCY
+from apps.monitoring.tracing import traced
+from settings import get_settings
 
-load_dotenv(".env")
 
+TEMPLATE_FOLDER = "apps/market_api/templates"
 
-class Settings:
-    MAIL_USERNAME = os.getenv("MAIL_USERNAME")
-    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
-    MAIL_FROM = os.getenv("MAIL_FROM")
-    MAIL_PORT = int(os.getenv("MAIL_PORT"))
-    MAIL_SERVER = os.getenv("MAIL_SERVER")
-    MAIL_FROM_NAME = os.getenv("MAIN_FROM_NAME")
-    TEMPLATE_FOLDER = "apps/market_api/templates"
 
+@lru_cache
+def get_mail_client():
+    """
+    FastMail client, built on the first email sent so fastapi_mail and its
+    settings are not loaded at startup
+    """
+    from fastapi_mail import ConnectionConfig, FastMail
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=Settings.MAIL_USERNAME,
-    MAIL_PASSWORD=Settings.MAIL_PASSWORD,
-    MAIL_PORT=Settings.MAIL_PORT,
-    MAIL_SERVER=Settings.MAIL_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    MAIL_FROM=Settings.MAIL_FROM,
-    MAIL_FROM_NAME=Settings.MAIL_FROM_NAME,
-    USE_CREDENTIALS=True,
-    TEMPLATE_FOLDER=Settings.TEMPLATE_FOLDER,
-)
+    settings = get_settings()
+    conf = ConnectionConfig(
+        MAIL_USERNAME=settings.mail_username,
+        MAIL_PASSWORD=settings.mail_password,
+        MAIL_PORT=settings.mail_port,
+        MAIL_SERVER=settings.mail_server,
+        MAIL_STARTTLS=True,
+        MAIL_SSL_TLS=False,
+        MAIL_FROM=settings.mail_from,
+        MAIL_FROM_NAME=settings.mail_from_name,
+        USE_CREDENTIALS=True,
+        TEMPLATE_FOLDER=TEMPLATE_FOLDER,
+    )
+    return FastMail(config=conf)
 
 
+@traced("email")
 async def send_email(
     email_to: str, order_uuid: UUID, username: str, delivery_status: str
 ) -> None:
+    from fastapi_mail import MessageSchema, MessageType
+
     subject = "[FastAPI_Testing] New Order Status Update"
     body = {
         "order_uuid": order_uuid,
@@ -48,5 +54,13 @@ async def send_email(
         subtype=MessageType.html,
     )
 
-    fm = FastMail(config=conf)
-    await fm.send_message(message=msg, template_name="email.html")
+    fm = get_mail_client()
+    started_at = time.perf_counter()
+    outcome = "error"
+    try:
+        await fm.send_message(message=msg, template_name="email.html")
+        outcome = "success"
+    finally:
+        EMAIL_SEND_LATENCY.labels(outcome=outcome).observe(
+            time.perf_counter() - started_at
+        )
@@ -1,52 +1,125 @@
-from uuid import UUID
+import base64
+import csv
+import functools
+import io
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import groupby, islice
+from typing import Iterable, Iterator
+from uuid import UUID, uuid4
 
 from fastapi import Depends
-from sqlalchemy import func
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from apps.market_api import providers
-from apps.market_api.business_logic import DeliveryStateMachine, get_state_class
+from apps.market_api import archive, providers
+from apps.market_api.business_logic import (
+    BULK_TRANSITIONS,
+    DeliveryStateMachine,
+    get_state_class,
+)
 from apps.market_api.exceptions import (
     CancelOrderIsNotAvailable,
     DeleteProductsIsNotAvailable,
+    InvalidCursorError,
     InvalidDeliveryStatusTransition,
+    OrderNotFoundError,
+    OrderUpdateConflictError,
 )
-from apps.market_api.models import Order, OrderDetail, User
+from apps.market_api.models import Order, OrderDetail, OrderStatusEvent, User, utcnow
+from apps.market_api.schema import OrderSchema, Product
+from apps.market_api.single_flight import SingleFlight
+from apps.market_api.total_counts import TotalMode
+from apps.monitoring.metrics import ORDER_STATUS_TRANSITIONS, ORDER_UPDATE_CONFLICTS
+from apps.monitoring.tracing import traced
 from database import get_db
 
+# identical reads running at the same time share one query and its
+# serialized result, keyed by the database they read from
+order_reads = SingleFlight("get_order_by_uuid")
+catalog_reads = SingleFlight("get_paginated_products")
+
+ORDER_UPDATE_ATTEMPTS = 3
+ORDER_STATUS_BATCH_SIZE = 1000
 
-def get_order_by_uuid(order_uuid: UUID, db: Session = Depends(get_db)) -> Order:
+
+def _retry_on_conflict(func):
+    """
+    Order updates only apply while the order's version is the one that was
+    read (see Order.version). When another request changed the order in the
+    meantime the whole service runs again from a fresh read, a few times
     """
-    Get an order by uuid
+
+    @functools.wraps(func)
+    def wrapper(*args, db: Session, **kwargs):
+        for _ in range(ORDER_UPDATE_ATTEMPTS):
+            try:
+                return func(*args, db=db, **kwargs)
+            except StaleDataError:
+                db.rollback()
+                ORDER_UPDATE_CONFLICTS.labels(func.__name__).inc()
+
+        raise OrderUpdateConflictError()
+
+    return wrapper
+
+
+@traced("services")
+def get_order_by_uuid(order_uuid: UUID, db: Session = Depends(get_db)) -> OrderSchema:
+    """
+    Get an order by uuid. Concurrent requests for the same order share one
+    fetch
     :param order_uuid: UUID
     :param db: Session = Depends(get_db)
-    :return: Order Model
+    :return: OrderSchema
     """
-    order = providers.get_order_by_uuid(order_uuid=order_uuid, db=db)
-    return order
 
+    def fetch_order():
+        order = providers.get_order_by_uuid(order_uuid=order_uuid, db=db)
+        return OrderSchema.model_validate(order)
+
+    return order_reads.do(key=(db.get_bind().url, order_uuid), func=fetch_order)
 
+
+@traced("services")
 def get_paginated_products(
     page_size: int = 10,
     page_num: int = 1,
     db: Session = Depends(get_db),
     search_text: str = None,
+    total_mode: TotalMode = "none",
 ) -> dict[str, str]:
     """
-    Get paginated products. Search filter by product name
+    Get paginated products. Search filter by product name. Concurrent
+    requests for the same page share one fetch
     :param page_size: int = 10
     :param page_num: int = 1
     :param db: Session = Depends(get_db)
     :param search_text: str = None
+    :param total_mode: TotalMode = "none"
     :return: dict[str, str]
     """
-    products = providers.get_products(db=db, search_text=search_text)
-    paginated_products = providers.get_paginated_data_by_query(
-        products, page_size, page_num
+
+    def fetch_products():
+        products = providers.get_products(db=db, search_text=search_text)
+        paginated_products = providers.get_paginated_data_by_query(
+            products, page_size, page_num, total_mode
+        )
+        paginated_products["data"] = [
+            Product.model_validate(product) for product in paginated_products["data"]
+        ]
+        return paginated_products
+
+    return catalog_reads.do(
+        key=(db.get_bind().url, page_size, page_num, search_text, total_mode),
+        func=fetch_products,
     )
-    return paginated_products
 
 
+@traced("services")
+@_retry_on_conflict
 def delete_user_order(
     user_uuid: UUID, order_uuid: UUID, db: Session = Depends(get_db)
 ) -> None:
@@ -66,15 +139,18 @@ def delete_user_order(
     ):
         raise CancelOrderIsNotAvailable()
 
+    providers.release_order_stock(order_uuid=order_uuid, db=db)
     db.delete(order)
     db.commit()
 
 
+@traced("services")
 def get_paginated_user_orders(
     user_uuid: UUID,
     db: Session = Depends(get_db),
     page_size: int = 10,
     page_num: int = 1,
+    total_mode: TotalMode = "none",
 ) -> dict[str, str]:
     """
     Get user's orders paginated by user uuid
@@ -82,15 +158,83 @@ def get_paginated_user_orders(
     :param db: Session = Depends(get_db)
     :param page_size: int = 10
     :param page_num: int = 1
+    :param total_mode: TotalMode = "none"
     :return: dict[str, str]
     """
     user_orders = providers.get_user_orders_by_user_uuid(user_uuid=user_uuid, db=db)
     paginated_user_orders = providers.get_paginated_data_by_query(
-        user_orders, page_size, page_num
+        user_orders, page_size, page_num, total_mode
     )
     return paginated_user_orders
 
 
+def _encode_cursor(order: Order) -> str:
+    cursor = f"{order.created_at.isoformat()}|{order.uuid}"
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, order_uuid = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(order_uuid)
+    except ValueError:
+        raise InvalidCursorError(cursor)
+
+
+@traced("services")
+def search_orders(
+    db: Session = Depends(get_db),
+    page_size: int = 50,
+    cursor: str = None,
+    delivery_statuses: list[str] = None,
+    created_from: datetime = None,
+    created_to: datetime = None,
+    updated_from: datetime = None,
+    updated_to: datetime = None,
+    email: str = None,
+    min_total: float = None,
+) -> dict:
+    """
+    Search orders for the admins, newest first. Pages are read with keyset
+    pagination: the cursor holds the (created_at, uuid) of the last order
+    returned, so deep pages cost the same as the first one
+    :param db: Session = Depends(get_db)
+    :param page_size: int = 50
+    :param cursor: str = None, next_cursor of the previous page
+    :param delivery_statuses: list[str] = None
+    :param created_from: datetime = None, included
+    :param created_to: datetime = None, excluded
+    :param updated_from: datetime = None, included
+    :param updated_to: datetime = None, excluded
+    :param email: str = None, the user's email
+    :param min_total: float = None
+    :return: dict with count, data and next_cursor (None on the last page)
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    # one extra row tells whether there is a next page
+    orders = providers.search_orders(
+        db=db,
+        limit=page_size + 1,
+        delivery_statuses=delivery_statuses,
+        created_from=created_from,
+        created_to=created_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+        email=email,
+        min_total=min_total,
+        after=after,
+    )
+
+    page = orders[:page_size]
+    return {
+        "count": len(page),
+        "data": page,
+        "next_cursor": _encode_cursor(page[-1]) if len(orders) > page_size else None,
+    }
+
+
+@traced("services")
+@_retry_on_conflict
 def update_order_status(
     order_uuid: UUID, update_status: str, db: Session = Depends(get_db)
 ) -> Order:
@@ -117,11 +261,68 @@ def update_order_status(
     return order
 
 
+@traced("services")
+def update_orders_status(
+    order_uuids: list[UUID], update_status: str, db: Session = Depends(get_db)
+) -> list[UUID]:
+    """
+    Move many orders to IN_PROGRESS or DELIVERED at once, in batches of
+    ORDER_STATUS_BATCH_SIZE orders with one statement and one commit each.
+    Orders that aren't in the previous status are left as they are
+    :param order_uuids: list[UUID]
+    :param update_status: str
+    :param db: Session = Depends(get_db)
+    :return: list[UUID] of the updated orders
+    """
+    to_status = update_status.upper()
+    if to_status not in BULK_TRANSITIONS:
+        raise InvalidDeliveryStatusTransition(
+            "{} can't be set in bulk".format(to_status)
+        )
+    from_status = BULK_TRANSITIONS[to_status]
+
+    updated = []
+    for batch in _batched(order_uuids, ORDER_STATUS_BATCH_SIZE):
+        updated += providers.set_orders_status(
+            order_uuids=batch, from_status=from_status, to_status=to_status, db=db
+        )
+        db.commit()
+
+    ORDER_STATUS_TRANSITIONS.labels(from_status=from_status, to_status=to_status).inc(
+        len(updated)
+    )
+    return updated
+
+
+@traced("services")
+def get_order_timeline(
+    order_uuid: UUID, db: Session = Depends(get_db)
+) -> list[OrderStatusEvent]:
+    """
+    Status transitions of an order, oldest first. The history is kept after
+    the order is archived
+    :param order_uuid: UUID
+    :param db: Session = Depends(get_db)
+    :return: list[OrderStatusEvent]
+    """
+    events = providers.get_order_status_events(order_uuid=order_uuid, db=db)
+
+    if not events:
+        # an order that never changed status, or no order at all
+        try:
+            providers.get_order_by_uuid(order_uuid=order_uuid, db=db)
+        except OrderNotFoundError:
+            providers.get_archived_order_by_uuid(order_uuid=order_uuid, db=db)
+    return events
+
+
+@traced("services")
 def create_order_with_products(
     user_uuid: UUID, product_uuids: list[UUID], db: Session = Depends(get_db)
 ) -> Order:
     """
-    Create user order with a list of product uuids
+    Create user order with a list of product uuids, one unit of each product
+    is reserved (ProductOutOfStockError when one is sold out)
     :param user_uuid: UUID
     :param product_uuids: list[UUID]
     :param db: Session = Depends(get_db)
@@ -133,6 +334,7 @@ def create_order_with_products(
     return order
 
 
+@traced("services")
 def create_user(
     first_name: str,
     last_name: str,
@@ -162,6 +364,7 @@ def create_user(
     return user
 
 
+@traced("services")
 def get_user_by_uuid(user_uuid: UUID, db: Session = Depends(get_db)) -> User:
     """
     Get a user by uuid
@@ -173,6 +376,7 @@ def get_user_by_uuid(user_uuid: UUID, db: Session = Depends(get_db)) -> User:
     return user
 
 
+@traced("services")
 def update_user_contact_info(
     user_uuid: UUID,
     db: Session = Depends(get_db),
@@ -196,11 +400,13 @@ def update_user_contact_info(
     return user
 
 
+@traced("services")
 def get_paginated_products_data_by_order_uuid(
     order_uuid: UUID,
     page_size: int = 10,
     page_num: int = 1,
     db: Session = Depends(get_db),
+    total_mode: TotalMode = "none",
 ) -> dict[str, str]:
     """
     Get product's orders paginated by order uuid
@@ -208,29 +414,33 @@ def get_paginated_products_data_by_order_uuid(
     :param page_size: int = 10
     :param page_num: int = 1
     :param db: Session = Depends(get_db)
+    :param total_mode: TotalMode = "none"
     :return: dict[str, str]
     """
     products = providers.get_products_data_by_order_uuid(order_uuid=order_uuid, db=db)
     paginated_products = providers.get_paginated_data_by_query(
-        products, page_size, page_num
+        products, page_size, page_num, total_mode
     )
     return paginated_products
 
 
+@traced("services")
+@_retry_on_conflict
 def add_order_products(
     order_uuid: UUID, product_uuids: list[UUID], db: Session = Depends(get_db)
 ) -> None:
     """
-    Add products to order
+    Add products to order, reserving one unit of each new product
     :param order_uuid: UUID
     :param product_uuids: list[UUID]
     :param db: Session = Depends(get_db)
     :return: None
     """
+    order = providers.get_order_by_uuid(order_uuid=order_uuid, db=db)
     order_detail = providers.get_order_products_by_order_uuid(
         order_uuid=order_uuid, db=db
     )
-    products = providers.get_products_by_uuids(product_uuids, db=db)
+    products = providers.get_products_by_uuids(product_uuids, db=db).all()
 
     products_found = {product.uuid for product in products}
     order_products_found = {product.product_uuid for product in order_detail}
@@ -238,21 +448,33 @@ def add_order_products(
 
     bulk_list = []
     for product_uuid in product_uuids:
-        bulk_list.append(OrderDetail(order_uuid=order_uuid, product_uuid=product_uuid))
+        bulk_list.append(
+            OrderDetail(
+                order_uuid=order_uuid,
+                order_created_at=order.created_at,
+                product_uuid=product_uuid,
+            )
+        )
 
-    db.bulk_save_objects(bulk_list)
-    db.commit()
+    if not product_uuids:
+        return
 
-    if product_uuids:
-        total_receipt = sum(
-            [order_product.product.price for order_product in order_detail]
+    if order.delivery_status != "CANCELLED":
+        # a cancelled order reserves all its products when it's revived
+        providers.reserve_stock(
+            products=[p for p in products if p.uuid in product_uuids], db=db
         )
-        order = providers.get_order_by_uuid(order_uuid=order_uuid, db=db)
-        order.total_receipt = total_receipt
-        order.updated_at = func.now()
-        db.commit()
+    # the new products and the total are committed together, the order
+    # update fails (and everything is retried) if the order changed
+    db.bulk_save_objects(bulk_list)
+    total_receipt = sum([order_product.product.price for order_product in order_detail])
+    order.total_receipt = total_receipt
+    order.updated_at = utcnow()
+    db.commit()
 
 
+@traced("services")
+@_retry_on_conflict
 def delete_order_products(
     order_uuid: UUID, product_uuids: list[UUID], db: Session = Depends(get_db)
 ) -> None:
@@ -268,9 +490,10 @@ def delete_order_products(
     if order.delivery_status != "PREPARING_FOR_DELIVERY":
         raise DeleteProductsIsNotAvailable()
 
-    providers.delete_order_products(
+    deleted = providers.delete_order_products(
         order_uuid=order_uuid, product_uuids=product_uuids, db=db
     )
+    providers.release_stock(product_uuids=deleted, db=db)
 
     order_detail = providers.get_order_products_by_order_uuid(
         order_uuid=order_uuid, db=db
@@ -278,9 +501,326 @@ def delete_order_products(
     total_receipt = sum([order_product.product.price for order_product in order_detail])
 
     order.total_receipt = total_receipt
-    order.updated_at = func.now()
-    db.commit()
+    order.updated_at = utcnow()
 
     if order_detail.count() == 0:
-        order.delete()
+        db.delete(order)
+    db.commit()
+
+
+@traced("services")
+def archive_orders(
+    cutoff: datetime, batch_size: int = 1000, db: Session = Depends(get_db)
+) -> int:
+    """
+    Move DELIVERED and CANCELLED orders created before the cutoff (and their
+    products) to the compressed archive, one batch per transaction
+    :param cutoff: datetime
+    :param batch_size: int = 1000
+    :param db: Session = Depends(get_db)
+    :return: int number of archived orders
+    """
+    path = archive.archive_file_path()
+    archived = 0
+
+    while True:
+        orders = providers.get_archivable_orders(
+            cutoff=cutoff,
+            delivery_statuses=archive.TERMINAL_STATUSES,
+            limit=batch_size,
+            db=db,
+        )
+        if not orders:
+            break
+
+        order_uuids = [order.uuid for order in orders]
+        order_products = defaultdict(list)
+        for order_uuid, product in providers.get_products_by_order_uuids(
+            order_uuids=order_uuids, db=db
+        ):
+            order_products[order_uuid].append(
+                {
+                    "uuid": product.uuid,
+                    "name": product.name,
+                    "sku": product.sku,
+                    "price": product.price,
+                }
+            )
+
+        records = [
+            {
+                **OrderSchema.model_validate(order).model_dump(),
+                "products": order_products[order.uuid],
+            }
+            for order in orders
+        ]
+        offset = archive.write_batch(path=path, records=records)
+
+        providers.create_archived_orders(
+            archived_orders=[
+                {
+                    "uuid": order.uuid,
+                    "user_uuid": order.user_uuid,
+                    "delivery_status": order.delivery_status,
+                    "archive_file": path,
+                    "archive_offset": offset,
+                    "created_at": order.created_at,
+                }
+                for order in orders
+            ],
+            db=db,
+        )
+        providers.delete_orders_by_uuids(order_uuids=order_uuids, db=db)
         db.commit()
+        db.expunge_all()
+
+        archived += len(orders)
+
+    return archived
+
+
+@traced("services")
+def get_archived_order_by_uuid(order_uuid: UUID, db: Session = Depends(get_db)) -> dict:
+    """
+    Get an archived order by uuid, read back from the compressed archive
+    :param order_uuid: UUID
+    :param db: Session = Depends(get_db)
+    :return: dict
+    """
+    archived_order = providers.get_archived_order_by_uuid(order_uuid=order_uuid, db=db)
+    order = archive.find_record(
+        path=archived_order.archive_file,
+        offset=archived_order.archive_offset,
+        order_uuid=order_uuid,
+    )
+
+    if order is None:
+        raise OrderNotFoundError(order_uuid)
+
+    return order
+
+
+EXPORT_CSV_HEADER = [
+    "order_uuid",
+    "delivery_status",
+    "total_receipt",
+    "created_at",
+    "updated_at",
+    "user_uuid",
+    "email",
+    "first_name",
+    "last_name",
+    "product_uuid",
+    "sku",
+    "product_name",
+    "price",
+]
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _export_ndjson_lines(rows) -> Iterator[str]:
+    for _, order_rows in groupby(rows, key=lambda row: row.uuid):
+        order_rows = list(order_rows)
+        order = order_rows[0]
+        yield json.dumps(
+            {
+                "uuid": str(order.uuid),
+                "delivery_status": order.delivery_status,
+                "total_receipt": order.total_receipt,
+                "created_at": order.created_at.isoformat(),
+                "updated_at": order.updated_at and order.updated_at.isoformat(),
+                "user": {
+                    "uuid": str(order.user_uuid),
+                    "email": order.email,
+                    "first_name": order.first_name,
+                    "last_name": order.last_name,
+                },
+                "products": [
+                    {
+                        "uuid": str(row.product_uuid),
+                        "sku": row.sku,
+                        "name": row.product_name,
+                        "price": row.price,
+                    }
+                    for row in order_rows
+                    if row.product_uuid
+                ],
+            }
+        ) + "\n"
+
+
+def _export_csv_lines(rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_CSV_HEADER)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def export_orders(export_format: str, db: Session = Depends(get_db)) -> Iterator[str]:
+    """
+    Stream every order with its user and products, as NDJSON (one order per
+    line) or CSV (one product per line). Rows are read through a server-side
+    cursor and yielded in chunks, so memory use does not grow with the table
+    :param export_format: str 'ndjson' | 'csv'
+    :param db: Session = Depends(get_db)
+    :return: Iterator[str]
+    """
+    rows = providers.get_orders_export_rows(db=db)
+    lines = (
+        _export_csv_lines(rows)
+        if export_format == "csv"
+        else _export_ndjson_lines(rows)
+    )
+
+    chunk = []
+    chunk_size = 0
+    for line in lines:
+        chunk.append(line)
+        chunk_size += len(line)
+
+        if chunk_size >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+            chunk_size = 0
+
+    if chunk:
+        yield "".join(chunk)
+
+
+PRODUCT_IMPORT_FIELDS = (
+    "name",
+    "description",
+    "unit",
+    "unit_size",
+    "weight",
+    "price",
+    "stock",
+)
+
+
+# products are upserted by sku, rows without one would be duplicated by
+# every import
+PRODUCT_IMPORT_REQUIRED_FIELDS = ("sku", "name", "brand", "category")
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+
+def _batched(records: Iterable, batch_size: int) -> Iterator[list]:
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        yield batch
+
+
+@traced("services")
+def import_catalog(
+    records: Iterable[dict], batch_size: int = 5000, db: Session = Depends(get_db)
+) -> dict:
+    """
+    Import a product catalog in batches. Brands and categories are matched by
+    name (created once when missing) and products are upserted by sku with one
+    multi-row INSERT ... ON CONFLICT per batch
+    :param records: Iterable[dict] with name, sku, brand, category, description,
+    unit, unit_size, weight, price and stock (a missing stock keeps the current
+    one, sharded products get it spread over their shards)
+    :param batch_size: int = 5000
+    :param db: Session = Depends(get_db)
+    :return: dict import stats, rows without sku, name, brand or category are
+    skipped and reported in errors (the first MAX_REPORTED_IMPORT_ERRORS)
+    """
+    started = time.perf_counter()
+    brand_uuids = providers.get_brand_uuids_by_name(db=db)
+    category_uuids = providers.get_category_uuids_by_name(db=db)
+    stats = {"products": 0, "brands": 0, "categories": 0, "skipped": 0, "errors": []}
+
+    for rows in _batched(enumerate(records, start=1), batch_size):
+        batch = []
+        for row, record in rows:
+            missing = [f for f in PRODUCT_IMPORT_REQUIRED_FIELDS if not record.get(f)]
+            if not missing:
+                batch.append(record)
+                continue
+
+            stats["skipped"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_IMPORT_ERRORS:
+                stats["errors"].append(
+                    {"row": row, "error": "missing {}".format(", ".join(missing))}
+                )
+        if not batch:
+            continue
+
+        new_brands = {r["brand"] for r in batch} - brand_uuids.keys()
+        new_categories = {r["category"] for r in batch} - category_uuids.keys()
+
+        brand_uuids.update({name: uuid4() for name in new_brands})
+        category_uuids.update({name: uuid4() for name in new_categories})
+        if new_brands:
+            providers.create_brands(
+                brands=[
+                    {"uuid": brand_uuids[name], "name": name} for name in new_brands
+                ],
+                db=db,
+            )
+        if new_categories:
+            providers.create_categories(
+                categories=[
+                    {"uuid": category_uuids[name], "name": name}
+                    for name in new_categories
+                ],
+                db=db,
+            )
+
+        # one row per sku, the last occurrence wins like it would across batches
+        products = {}
+        for record in batch:
+            product = {field: record.get(field) for field in PRODUCT_IMPORT_FIELDS}
+            product.update(
+                uuid=uuid4(),
+                sku=record["sku"],
+                brand_uuid=brand_uuids[record["brand"]],
+                category_uuid=category_uuids[record["category"]],
+            )
+            products[product["sku"]] = product
+
+        providers.upsert_products_by_sku(products=list(products.values()), db=db)
+        providers.refresh_product_catalog(db=db, skus=list(products))
+        stocked_skus = [
+            sku for sku, product in products.items() if product["stock"] is not None
+        ]
+        if stocked_skus:
+            providers.spread_stock_over_shards(skus=stocked_skus, db=db)
+        db.commit()
+
+        stats["products"] += len(products)
+        stats["brands"] += len(new_brands)
+        stats["categories"] += len(new_categories)
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["products_per_second"] = stats["products"] / (stats["seconds"] or 1)
+    return stats
+
+
+@traced("services")
+def set_product_stock(
+    sku: str,
+    stock: int = None,
+    stock_shards: int = None,
+    db: Session = Depends(get_db),
+) -> None:
+    """
+    Set the stock of a product and/or split it over stock_shards counters
+    (0 goes back to a single counter). Hot products take more shards, each
+    reservation then only locks one of them
+    :param sku: str
+    :param stock: int = None, units left are kept by default
+    :param stock_shards: int = None
+    :param db: Session = Depends(get_db)
+    :return: None
+    """
+    providers.set_product_stock(sku=sku, stock=stock, stock_shards=stock_shards, db=db)
+    db.commit()
@@ -0,0 +1,66 @@
+"""
+Request coalescing for hot reads.
+
+Concurrent calls with the same key share one execution: the first caller
+runs the function, the others wait for it and all of them are released
+together with its result (or its exception). Nothing is kept once the call
+returns, so a later call always runs the function again.
+
+Sync endpoints run in a thread pool, so waiting blocks the calling thread.
+"""
+
+import threading
+from typing import Callable, Hashable, TypeVar
+
+from apps.monitoring.metrics import COALESCED_READS
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        Run func, or wait for the call already running for key
+        :param key: Hashable
+        :param func: Callable without arguments
+        :return: the result of func
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            COALESCED_READS.labels(self.name).inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
@@ -0,0 +1,29 @@
+"""
+Set the stock of a product.
+
+Products with a NULL stock aren't tracked and can always be ordered. A hot
+product can split its stock over several counters (shards) so concurrent
+orders don't all wait on the lock of one row, 0 shards is one counter:
+    python -m apps.market_api.stock SKU-123 --stock 500
+    python -m apps.market_api.stock SKU-123 --shards 16
+"""
+
+import argparse
+
+if __name__ == "__main__":
+    from apps.market_api import services
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sku")
+    parser.add_argument("--stock", type=int)
+    parser.add_argument("--shards", type=int)
+    args = parser.parse_args()
+
+    try:
+        services.set_product_stock(
+            sku=args.sku, stock=args.stock, stock_shards=args.shards, db=next(get_db())
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"[OK] {args.sku} stock updated")
@@ -0,0 +1,31 @@
+from uuid import uuid4
+
+from apps.market_api import archive
+
+
+def test_write_and_read_batch(tmp_path):
+    path = archive.archive_file_path(archive_dir=str(tmp_path))
+    first_batch = [{"uuid": str(uuid4()), "delivery_status": "DELIVERED"}]
+    second_batch = [
+        {"uuid": str(uuid4()), "delivery_status": "CANCELLED"} for _ in range(3)
+    ]
+
+    first_offset = archive.write_batch(path=path, records=first_batch)
+    second_offset = archive.write_batch(path=path, records=second_batch)
+
+    assert first_offset == 0
+    assert second_offset > first_offset
+    assert list(archive.read_batch(path=path, offset=first_offset)) == first_batch
+    assert list(archive.read_batch(path=path, offset=second_offset)) == second_batch
+
+
+def test_find_record(tmp_path):
+    path = archive.archive_file_path(archive_dir=str(tmp_path))
+    order_uuid = uuid4()
+    records = [{"uuid": str(uuid4())}, {"uuid": str(order_uuid)}]
+    offset = archive.write_batch(path=path, records=records)
+
+    assert archive.find_record(path=path, offset=offset, order_uuid=order_uuid) == {
+        "uuid": str(order_uuid)
+    }
+    assert archive.find_record(path=path, offset=offset, order_uuid=uuid4()) is None
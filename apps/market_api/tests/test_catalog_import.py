@@ -0,0 +1,41 @@
+import io
+import json
+
+import pytest
+
+from apps.market_api import catalog_import
+
+PRODUCTS = [
+    {"name": "Milk", "sku": "1", "brand": "Great Value", "category": "Dairy"},
+    {"name": "Eggs", "sku": "2", "brand": "Great Value", "category": "Dairy"},
+]
+
+
+def test_iter_json_array(mocker):
+    mocker.patch.object(catalog_import, "READ_CHUNK_SIZE", 7)
+
+    document = io.StringIO(json.dumps(PRODUCTS))
+    assert list(catalog_import.iter_json_array(document)) == PRODUCTS
+
+    document = io.StringIO(json.dumps({"products": PRODUCTS, "users": []}))
+    assert list(catalog_import.iter_json_array(document)) == PRODUCTS
+
+    document = io.StringIO(json.dumps({"users": []}))
+    with pytest.raises(ValueError):
+        list(catalog_import.iter_json_array(document))
+
+
+def test_iter_csv():
+    document = io.StringIO("name,sku,price,weight,stock\nMilk,1,3.45,,12\n")
+    assert list(catalog_import.iter_csv(document)) == [
+        {"name": "Milk", "sku": "1", "price": 3.45, "weight": None, "stock": 12}
+    ]
+
+
+def test_read_catalog(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("\n".join(json.dumps(product) for product in PRODUCTS))
+    assert list(catalog_import.read_catalog(str(path))) == PRODUCTS
+
+    with pytest.raises(ValueError):
+        list(catalog_import.read_catalog(str(tmp_path / "catalog.xml")))
@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from apps.market_api.models import uuid7, uuid7_time
+
+
+def test_uuid7_version_and_variant():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_timestamp():
+    timestamp = datetime(2024, 6, 17, 9, 38, 22, 904000, tzinfo=timezone.utc)
+
+    value = uuid7(timestamp=timestamp)
+
+    assert value.int >> 80 == int(timestamp.timestamp() * 1000)
+    assert uuid7_time(value) == timestamp
+    assert uuid7_time(uuid.uuid4()) is None
+
+
+def test_uuid7_sorts_by_time():
+    now = datetime.now(timezone.utc)
+    values = [uuid7(timestamp=now + timedelta(milliseconds=i)) for i in range(100)]
+
+    assert sorted(values) == values
+    assert len(set(uuid7(timestamp=now) for _ in range(1000))) == 1000
+
+
+def test_order_uuid_is_uuid7(session, create_user, create_order):
+    new_order = create_order(session, create_user(session))
+
+    assert new_order.uuid.version == 7
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from apps.market_api import partitions
+from apps.market_api.exceptions import DefaultPartitionNotEmptyError
+
+
+def test_add_months():
+    assert partitions.add_months(date(2024, 11, 1), 1) == date(2024, 12, 1)
+    assert partitions.add_months(date(2024, 12, 1), 1) == date(2025, 1, 1)
+    assert partitions.add_months(date(2024, 1, 1), 14) == date(2025, 3, 1)
+
+
+def test_create_partition_ddl():
+    ddl = partitions.create_partition_ddl("order", date(2024, 12, 17))
+    assert ddl == (
+        'CREATE TABLE IF NOT EXISTS "order_2024_12" PARTITION OF "order" '
+        "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+    )
+
+
+def test_detach_partition_ddl():
+    ddl = partitions.detach_partition_ddl("order_detail", date(2024, 5, 31))
+    assert ddl == 'ALTER TABLE "order_detail" DETACH PARTITION "order_detail_2024_05"'
+
+
+def test_default_partition_rows_sql():
+    sql = partitions.default_partition_rows_sql("order_detail", date(2024, 12, 17))
+    assert sql == (
+        'SELECT EXISTS (SELECT 1 FROM "order_detail_default" '
+        "WHERE \"order_created_at\" >= '2024-12-01' "
+        "AND \"order_created_at\" < '2025-01-01')"
+    )
+
+
+def test_create_monthly_partitions_refuses_filled_default(mocker):
+    connection = mocker.Mock()
+    # the partition doesn't exist yet, the DEFAULT one does and holds rows
+    connection.execute.return_value.one.return_value = (False, True)
+    connection.execute.return_value.scalar.return_value = True
+
+    with pytest.raises(DefaultPartitionNotEmptyError):
+        partitions.create_monthly_partitions(connection, start=date(2024, 12, 1))
+
+    executed = [str(call.args[0]) for call in connection.execute.call_args_list]
+    assert not any(sql.startswith("CREATE TABLE") for sql in executed)
+
+
+def test_create_monthly_partitions(mocker):
+    connection = mocker.Mock()
+    connection.execute.return_value.one.return_value = (False, True)
+    connection.execute.return_value.scalar.return_value = False
+
+    names = partitions.create_monthly_partitions(
+        connection, start=date(2024, 12, 1), months=1
+    )
+
+    assert names == [
+        "order_2024_12",
+        "order_detail_2024_12",
+        "order_2025_01",
+        "order_detail_2025_01",
+    ]
@@ -0,0 +1,51 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from apps.auth.services import get_current_user
+from database import QueryStats, engine, query_stats
+from main import app
+
+client = TestClient(app)
+
+
+async def mock_user():
+    return {"user": {"name": "test-user"}}
+
+
+app.dependency_overrides[get_current_user] = mock_user
+
+
+def test_query_stats_record():
+    stats = QueryStats()
+    stats.record(statement="SELECT 1", duration=0.002)
+    stats.record(statement="SELECT 2", duration=0.005)
+
+    assert stats.count == 2
+    assert stats.slowest_statement == "SELECT 2"
+    assert stats.server_timing() == 'db;dur=7.00;desc="2 queries", db-slowest;dur=5.00'
+
+
+def test_query_stats_engine_hooks():
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        query_stats.reset(token)
+
+    assert stats.count == 1
+    assert stats.slowest_statement == "SELECT 1"
+
+
+def test_server_timing_header(mocker):
+    mocker.patch(
+        "apps.market_api.v1.resources.product.services.get_paginated_products",
+        return_value={"count": 0, "data": []},
+    )
+    response = client.get(
+        "/market-api/v1/products", headers={"Authorization": "Bearer token-123"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Server-Timing"].startswith('db;dur=0.00;desc="0 queries"')
@@ -0,0 +1,181 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, false, update
+from sqlalchemy.orm import sessionmaker
+
+import database
+from apps.auth.services import get_current_user
+from apps.auth.utils import create_access_token
+from apps.market_api import models
+
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    engines = [
+        create_engine(f"sqlite:///{tmp_path / f'replica_{i}.db'}") for i in range(2)
+    ]
+    monkeypatch.setattr(
+        database,
+        "replica_sessions",
+        [sessionmaker(autoflush=False, bind=engine) for engine in engines],
+    )
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def client_writes():
+    writes = database.ClientWrites()
+    token = database.client_writes.set(writes)
+    yield writes
+    database.client_writes.reset(token)
+
+
+def read_bind():
+    db = database.get_read_db()
+    session = next(db)
+    db.close()
+    return session.get_bind()
+
+
+def test_read_db_without_replicas_uses_primary():
+    assert read_bind() is database.engine
+
+
+def test_read_db_round_robin(replicas):
+    binds = [read_bind() for _ in range(4)]
+
+    assert set(binds) == set(replicas)
+    assert binds[0] is binds[2] and binds[1] is binds[3]
+
+
+def test_read_your_writes(replicas, client_writes):
+    with database.SessionLocal() as db:
+        db.execute(update(models.Brand).where(false()).values(name="brand"))
+        db.commit()
+
+    assert client_writes.wrote
+    assert read_bind() is database.engine
+
+    # another request of the same client, with the cookie of the write
+    cookie = f"{client_writes.last_write_at:.3f}"
+    token = database.client_writes.set(database.ClientWrites.from_cookie(cookie))
+    try:
+        assert read_bind() is database.engine
+    finally:
+        database.client_writes.reset(token)
+
+    token = database.client_writes.set(database.ClientWrites.from_cookie(None))
+    try:
+        assert read_bind() in replicas
+    finally:
+        database.client_writes.reset(token)
+
+
+def test_client_writes_from_cookie():
+    assert (
+        database.ClientWrites.from_cookie("1716195000.5").last_write_at == 1716195000.5
+    )
+    assert database.ClientWrites.from_cookie("not a time").last_write_at is None
+    assert database.ClientWrites.from_cookie(None).last_write_at is None
+
+
+def test_read_only_commit_is_not_sticky(replicas, client_writes):
+    with database.SessionLocal() as db:
+        db.query(models.Brand).first()
+        db.commit()
+
+    assert not client_writes.wrote
+    assert read_bind() in replicas
+
+
+def test_read_your_writes_expires(replicas, client_writes, monkeypatch):
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    with database.SessionLocal() as db:
+        db.execute(update(models.Brand).where(false()).values(name="brand"))
+        db.commit()
+
+    assert read_bind() in replicas
+
+
+def test_read_only_transaction_on_postgres(mocker):
+    connection = mocker.Mock()
+    connection.dialect.name = "postgresql"
+
+    database.set_transaction_read_only(
+        session=None, transaction=None, connection=connection
+    )
+
+    connection.exec_driver_sql.assert_called_once_with("SET TRANSACTION READ ONLY")
+
+
+def test_read_only_transaction_skipped_on_sqlite(mocker):
+    connection = mocker.Mock()
+    connection.dialect.name = "sqlite"
+
+    database.set_transaction_read_only(
+        session=None, transaction=None, connection=connection
+    )
+
+    connection.exec_driver_sql.assert_not_called()
+
+
+def test_objects_are_not_expired_on_commit():
+    with database.SessionLocal() as db:
+        brand = models.Brand(name="Brand not expired")
+        db.add(brand)
+        db.commit()
+
+        assert "name" in brand.__dict__
+        db.delete(brand)
+        db.commit()
+
+
+def test_current_user_releases_connection():
+    with database.SessionLocal() as db:
+        user = models.User(
+            first_name="Pool",
+            last_name="Test",
+            phone_number=5550000,
+            email=f"{uuid4()}@example.com",
+        )
+        db.add(user)
+        db.commit()
+
+        token = create_access_token(data={"sub": str(user.uuid)})
+        current_user = get_current_user(token=token, db=db)
+
+        assert current_user.uuid == user.uuid
+        assert "group" in current_user.__dict__
+        assert not db.in_transaction()
+
+        db.delete(user)
+        db.commit()
+
+
+def test_current_user_falls_back_to_primary(replicas):
+    for replica in replicas:
+        models.Base.metadata.create_all(replica)
+
+    with database.SessionLocal() as primary_db:
+        user = models.User(
+            first_name="Replica",
+            last_name="Lag",
+            phone_number=5550001,
+            email=f"{uuid4()}@example.com",
+        )
+        primary_db.add(user)
+        primary_db.commit()
+        token = create_access_token(data={"sub": str(user.uuid)})
+
+        # not replicated yet
+        with database.replica_sessions[0]() as replica_db:
+            current_user = get_current_user(
+                token=token, db=replica_db, primary_db=primary_db
+            )
+
+        assert current_user.uuid == user.uuid
+        primary_db.delete(user)
+        primary_db.commit()
@@ -0,0 +1,106 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from apps.auth.services import get_current_user, validate_admin_group
+from apps.market_api.exceptions import (
+    InvalidCursorError,
+    InvalidDeliveryStatusTransition,
+)
+from apps.market_api.tests.test_database import override_get_db
+from database import get_db, get_read_db
+from main import app
+
+client = TestClient(app)
+
+
+async def mock_user():
+    return {"user": {"name": "test-user"}}
+
+
+app.dependency_overrides[get_current_user] = mock_user
+app.dependency_overrides[validate_admin_group] = mock_user
+app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
+
+FAKE_TOKEN = "Bearer token-123"
+URL_PATH = "/market-api/v1/admin/orders/export"
+
+
+def test_search_orders(mocker, order):
+    mock_search_orders = mocker.patch(
+        "apps.market_api.v1.resources.admin_order.services.search_orders",
+        return_value={"count": 1, "data": [order], "next_cursor": "abc"},
+    )
+    headers = {"Authorization": FAKE_TOKEN}
+
+    response = client.get(
+        "/market-api/v1/admin/orders?status=IN_PROGRESS&status=PREPARING_FOR_DELIVERY"
+        "&created_from=2024-07-01T00:00:00Z&min_total=10",
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next_cursor"] == "abc"
+    assert response.json()["data"][0]["uuid"] == str(order.uuid)
+    assert mock_search_orders.call_args.kwargs["delivery_statuses"] == [
+        "IN_PROGRESS",
+        "PREPARING_FOR_DELIVERY",
+    ]
+
+    response = client.get("/market-api/v1/admin/orders?status=LOST", headers=headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    mock_search_orders.side_effect = InvalidCursorError
+    response = client.get("/market-api/v1/admin/orders?cursor=abc", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_export_orders(mocker):
+    mock_export_orders = mocker.patch(
+        "apps.market_api.v1.resources.admin_order.services.export_orders",
+        return_value=iter(['{"uuid": "1"}\n', '{"uuid": "2"}\n']),
+    )
+    read_db = mocker.Mock()
+
+    def get_read_db():
+        yield read_db
+
+    mocker.patch(
+        "apps.market_api.v1.resources.admin_order.get_read_db", side_effect=get_read_db
+    )
+    headers = {"Authorization": FAKE_TOKEN}
+
+    response = client.get(URL_PATH, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    # streamed from the read-only session, not a primary one
+    assert mock_export_orders.call_args.kwargs["db"] is read_db
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.splitlines() == ['{"uuid": "1"}', '{"uuid": "2"}']
+
+    mock_export_orders.return_value = iter(["order_uuid\n"])
+    response = client.get(URL_PATH + "?format=csv", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+
+    response = client.get(URL_PATH + "?format=xml", headers=headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_update_orders_status(mocker, order):
+    mock_update_orders_status = mocker.patch(
+        "apps.market_api.v1.resources.admin_order.services.update_orders_status",
+        return_value=[order.uuid],
+    )
+    headers = {"Authorization": FAKE_TOKEN}
+    body = {"order_uuids": [str(order.uuid)], "update_status": "DELIVERED"}
+
+    response = client.post(
+        "/market-api/v1/admin/orders/status", headers=headers, json=body
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"count": 1, "order_uuids": [str(order.uuid)]}
+
+    mock_update_orders_status.side_effect = InvalidDeliveryStatusTransition
+    response = client.post(
+        "/market-api/v1/admin/orders/status", headers=headers, json=body
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from fastapi import BackgroundTasks, status
 from fastapi.testclient import TestClient
 
@@ -5,9 +7,12 @@ from apps.auth.services import get_current_user, validate_admin_group
 from apps.market_api.exceptions import (
     InvalidDeliveryStatusTransition,
     OrderNotFoundError,
+    OrderUpdateConflictError,
+    ProductOutOfStockError,
 )
+from apps.market_api.models import OrderStatusEvent
 from apps.market_api.tests.test_database import override_get_db
-from database import get_db
+from database import get_db, get_read_db
 from main import app
 
 client = TestClient(app)
@@ -20,6 +25,7 @@ async def mock_user():
 app.dependency_overrides[get_current_user] = mock_user
 app.dependency_overrides[validate_admin_group] = mock_user
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 FAKE_TOKEN = "Bearer token-123"
 URL_PATH = "/market-api/v1/orders/{}"
@@ -42,6 +48,57 @@ def test_get_order(mocker, order):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+def test_get_order_timeline(mocker, order):
+    event = OrderStatusEvent(
+        order_uuid=order.uuid,
+        from_status="PREPARING_FOR_DELIVERY",
+        to_status="IN_PROGRESS",
+        created_at=datetime(2024, 7, 1, 12, tzinfo=timezone.utc),
+    )
+    mock_get_order_timeline = mocker.patch(
+        "apps.market_api.v1.resources.order.services.get_order_timeline",
+        return_value=[event],
+    )
+    headers = {"Authorization": FAKE_TOKEN}
+
+    response = client.get(URL_PATH.format(order.uuid) + "/timeline", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {
+            "from_status": "PREPARING_FOR_DELIVERY",
+            "to_status": "IN_PROGRESS",
+            "created_at": "2024-07-01T12:00:00Z",
+        }
+    ]
+
+    mock_get_order_timeline.side_effect = OrderNotFoundError
+    response = client.get(URL_PATH.format(order.uuid) + "/timeline", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_archived_order(mocker, order):
+    mocker.patch(
+        "apps.market_api.v1.resources.order.services.get_order_by_uuid",
+        side_effect=OrderNotFoundError,
+    )
+    mock_get_archived_order_by_uuid = mocker.patch(
+        "apps.market_api.v1.resources.order.services.get_archived_order_by_uuid",
+        return_value=order.model_dump(mode="json"),
+    )
+    response = client.get(
+        URL_PATH.format(order.uuid), headers={"Authorization": FAKE_TOKEN}
+    )
+    response_data = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert response_data["uuid"] == str(order.uuid)
+
+    mock_get_archived_order_by_uuid.side_effect = OrderNotFoundError
+    response = client.get(
+        URL_PATH.format(order.uuid), headers={"Authorization": FAKE_TOKEN}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 def test_update_order_delivery_status(mocker, order_model):
     mock_update_order_status = mocker.patch(
         "apps.market_api.v1.resources.order.services.update_order_status",
@@ -70,3 +127,17 @@ def test_update_order_delivery_status(mocker, order_model):
         URL_PATH.format(order_model.uuid), headers=headers, json=body
     )
     assert response.status_code == status.HTTP_409_CONFLICT
+
+    mock_update_order_status.side_effect = OrderUpdateConflictError
+    response = client.post(
+        URL_PATH.format(order_model.uuid), headers=headers, json=body
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["detail"] == "API_ORDER_UPDATE_CONFLICT"
+
+    mock_update_order_status.side_effect = ProductOutOfStockError
+    response = client.post(
+        URL_PATH.format(order_model.uuid), headers=headers, json=body
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["detail"] == "API_PRODUCT_OUT_OF_STOCK"
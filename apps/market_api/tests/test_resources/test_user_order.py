@@ -2,7 +2,11 @@ from fastapi import status
 from fastapi.testclient import TestClient
 
 from apps.auth.services import get_current_user
-from apps.market_api.exceptions import CancelOrderIsNotAvailable, OrderNotFoundError
+from apps.market_api.exceptions import (
+    CancelOrderIsNotAvailable,
+    OrderNotFoundError,
+    ProductOutOfStockError,
+)
 from main import app
 
 client = TestClient(app)
@@ -18,7 +22,7 @@ FAKE_TOKEN = "Bearer token-123"
 
 
 def test_create_user_order(mocker, user, order):
-    mocker.patch(
+    mock_create_order = mocker.patch(
         "apps.market_api.v1.resources.order.services.create_order_with_products"
     )
     headers = {"Authorization": FAKE_TOKEN}
@@ -36,6 +40,15 @@ def test_create_user_order(mocker, user, order):
     )
     assert response.status_code == status.HTTP_200_OK
 
+    mock_create_order.side_effect = ProductOutOfStockError
+    response = client.post(
+        url=f"/market-api/v1/users/{user.uuid}/orders/",
+        headers=headers,
+        json=body,
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["detail"] == "API_PRODUCT_OUT_OF_STOCK"
+
 
 def test_get_user_orders(mocker, user, order):
     mocker.patch(
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+
+def test_mail_is_not_imported_at_startup():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, main; assert 'fastapi_mail' not in sys.modules",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
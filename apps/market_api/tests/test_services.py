@@ -1,15 +1,28 @@
+from uuid import uuid4
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.exc import StaleDataError
 
-from apps.market_api import services
-from apps.market_api.exceptions import OrderNotFoundError
-from apps.market_api.tests.test_database import override_get_db
-from database import get_db
+from apps.market_api import models, providers, services
+from apps.market_api.exceptions import (
+    InvalidCursorError,
+    InvalidDeliveryStatusTransition,
+    OrderNotFoundError,
+    OrderUpdateConflictError,
+    ProductOutOfStockError,
+)
+from apps.market_api.models import uuid7_time
+from apps.market_api.tests.test_database import TestingSessionLocal, override_get_db
+from database import get_db, get_read_db
 from main import app
 
 client = TestClient(app)
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 
 def test_get_order_by_uuid(session, order, create_order, create_user):
@@ -42,6 +55,258 @@ def test_delete_user_order(session, create_order, create_user):
         )
 
 
+def order_product_uuids(session, order_uuid):
+    return {
+        detail.product_uuid
+        for detail in session.query(models.OrderDetail).filter(
+            models.OrderDetail.order_uuid == order_uuid
+        )
+    }
+
+
+def test_delete_user_order_deletes_products(
+    session, create_order, create_user, create_product
+):
+    new_user = create_user(session)
+    new_order = create_order(session, new_user)
+    products = [create_product(session) for _ in range(10)]
+    services.add_order_products(
+        order_uuid=new_order.uuid,
+        product_uuids=[product.uuid for product in products],
+        db=session,
+    )
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(session.get_bind(), "before_cursor_execute", count_statement)
+    try:
+        services.delete_user_order(
+            user_uuid=new_user.uuid, order_uuid=new_order.uuid, db=session
+        )
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", count_statement)
+
+    assert order_product_uuids(session, new_order.uuid) == set()
+    # untracked products are put back by one statement, not one per product
+    assert len([s for s in statements if s.startswith("UPDATE product ")]) == 1
+    assert len(statements) <= 7
+
+
+def test_delete_order_products(session, create_order, create_user, create_product):
+    new_user = create_user(session)
+    new_order = create_order(session, new_user)
+    products = [create_product(session), create_product(session)]
+    services.add_order_products(
+        order_uuid=new_order.uuid,
+        product_uuids=[product.uuid for product in products],
+        db=session,
+    )
+
+    services.delete_order_products(
+        order_uuid=new_order.uuid, product_uuids=[products[0].uuid], db=session
+    )
+    assert order_product_uuids(session, new_order.uuid) == {products[1].uuid}
+    assert new_order.total_receipt == products[1].price
+
+    services.delete_order_products(
+        order_uuid=new_order.uuid, product_uuids=[products[1].uuid], db=session
+    )
+    with pytest.raises(OrderNotFoundError):
+        services.get_order_by_uuid(order_uuid=new_order.uuid, db=session)
+
+
+def product_stock(session, product):
+    return session.scalar(
+        select(models.Product.stock).where(models.Product.uuid == product.uuid)
+    )
+
+
+def shard_stocks(session, product):
+    return session.scalars(
+        select(models.ProductStockShard.stock)
+        .where(models.ProductStockShard.product_uuid == product.uuid)
+        .order_by(models.ProductStockShard.shard)
+    ).all()
+
+
+def test_create_order_reserves_stock(session, create_user, create_product):
+    new_user = create_user(session)
+    products = [create_product(session), create_product(session)]
+    products[0].stock = 1
+    session.commit()
+    product_uuids = [product.uuid for product in products]
+
+    new_order = services.create_order_with_products(
+        user_uuid=new_user.uuid, product_uuids=product_uuids, db=session
+    )
+    assert product_stock(session, products[0]) == 0
+    assert product_stock(session, products[1]) is None
+
+    with pytest.raises(ProductOutOfStockError):
+        services.create_order_with_products(
+            user_uuid=new_user.uuid, product_uuids=product_uuids, db=session
+        )
+    assert session.query(models.Order).filter_by(user_uuid=new_user.uuid).count() == 1
+
+    services.update_order_status(
+        order_uuid=new_order.uuid, update_status="CANCELLED", db=session
+    )
+    assert product_stock(session, products[0]) == 1
+
+
+def test_revived_order_reserves_stock(session, create_user, create_product):
+    new_user = create_user(session)
+    new_product = create_product(session)
+    new_product.stock = 1
+    session.commit()
+    new_order = services.create_order_with_products(
+        user_uuid=new_user.uuid, product_uuids=[new_product.uuid], db=session
+    )
+    services.update_order_status(
+        order_uuid=new_order.uuid, update_status="CANCELLED", db=session
+    )
+    assert product_stock(session, new_product) == 1
+
+    services.update_order_status(
+        order_uuid=new_order.uuid, update_status="PREPARING_FOR_DELIVERY", db=session
+    )
+    assert product_stock(session, new_product) == 0
+    services.delete_user_order(
+        user_uuid=new_user.uuid, order_uuid=new_order.uuid, db=session
+    )
+    assert product_stock(session, new_product) == 1
+
+    # sold out while the order was cancelled, it stays cancelled
+    other_order = services.create_order_with_products(
+        user_uuid=new_user.uuid, product_uuids=[new_product.uuid], db=session
+    )
+    services.update_order_status(
+        order_uuid=other_order.uuid, update_status="CANCELLED", db=session
+    )
+    services.create_order_with_products(
+        user_uuid=new_user.uuid, product_uuids=[new_product.uuid], db=session
+    )
+    with pytest.raises(ProductOutOfStockError):
+        services.update_order_status(
+            order_uuid=other_order.uuid, update_status="IN_PROGRESS", db=session
+        )
+    assert (
+        services.get_order_by_uuid(
+            order_uuid=other_order.uuid, db=session
+        ).delivery_status
+        == "CANCELLED"
+    )
+    assert product_stock(session, new_product) == 0
+
+
+def test_order_products_stock(session, create_user, create_order, create_product):
+    new_user = create_user(session)
+    new_order = create_order(session, new_user)
+    new_product = create_product(session)
+    new_product.stock = 1
+    session.commit()
+
+    services.add_order_products(
+        order_uuid=new_order.uuid, product_uuids=[new_product.uuid], db=session
+    )
+    assert product_stock(session, new_product) == 0
+
+    services.delete_order_products(
+        order_uuid=new_order.uuid, product_uuids=[new_product.uuid], db=session
+    )
+    assert product_stock(session, new_product) == 1
+
+
+def test_sharded_stock(session, create_user, create_product):
+    new_user = create_user(session)
+    new_product = create_product(session)
+    new_product.sku = f"SKU-{uuid4()}"
+    session.commit()
+
+    with pytest.raises(ValueError):
+        services.set_product_stock(sku=new_product.sku, stock_shards=3, db=session)
+
+    services.set_product_stock(sku=new_product.sku, stock=5, stock_shards=3, db=session)
+    assert shard_stocks(session, new_product) == [2, 2, 1]
+    assert product_stock(session, new_product) is None
+
+    orders = [
+        services.create_order_with_products(
+            user_uuid=new_user.uuid, product_uuids=[new_product.uuid], db=session
+        )
+        for _ in range(4)
+    ]
+    assert sum(shard_stocks(session, new_product)) == 1
+
+    services.update_order_status(
+        order_uuid=orders[0].uuid, update_status="CANCELLED", db=session
+    )
+    assert sum(shard_stocks(session, new_product)) == 2
+
+    # back to one counter, the units left are kept
+    services.set_product_stock(sku=new_product.sku, stock_shards=0, db=session)
+    assert shard_stocks(session, new_product) == []
+    assert product_stock(session, new_product) == 2
+
+
+def test_product_catalog_follows_orm_writes(session):
+    brand = models.Brand(name=f"Brand {uuid4()}")
+    category = models.Category(name=f"Category {uuid4()}")
+    session.add_all([brand, category])
+    session.flush()
+    product = models.Product(
+        name="Milk", brand_uuid=brand.uuid, category_uuid=category.uuid, price=3.45
+    )
+    session.add(product)
+    session.commit()
+
+    def catalog_row():
+        return session.execute(
+            select(
+                models.ProductCatalog.name,
+                models.ProductCatalog.price,
+                models.ProductCatalog.brand_name,
+                models.ProductCatalog.category_name,
+            ).where(models.ProductCatalog.uuid == product.uuid)
+        ).one()
+
+    assert catalog_row() == ("Milk", 3.45, brand.name, category.name)
+
+    product.price = 2.99
+    brand.name = f"Brand {uuid4()}"
+    category.name = f"Category {uuid4()}"
+    session.commit()
+
+    assert catalog_row() == ("Milk", 2.99, brand.name, category.name)
+
+
+def test_import_catalog(session):
+    sku = f"SKU-{uuid4()}"
+    brand = f"Brand {uuid4()}"
+    records = [
+        {"name": "Milk", "sku": sku, "brand": brand, "category": "Dairy"},
+        {"name": "Eggs", "brand": brand, "category": "Dairy"},
+        {"name": "Bread", "sku": f"SKU-{uuid4()}", "brand": brand},
+    ]
+
+    for _ in range(2):
+        stats = services.import_catalog(records=records, db=session)
+        assert stats["products"] == 1
+        assert stats["skipped"] == 2
+        assert stats["errors"] == [
+            {"row": 2, "error": "missing sku"},
+            {"row": 3, "error": "missing category"},
+        ]
+
+    products = session.scalars(
+        select(models.Product).join(models.Brand).where(models.Brand.name == brand)
+    ).all()
+    assert [product.sku for product in products] == [sku]
+
+
 def test_update_order_status(session, create_user, create_order):
     new_user = create_user(session)
     new_order = create_order(session, new_user)
@@ -52,6 +317,179 @@ def test_update_order_status(session, create_user, create_order):
     assert new_order.delivery_status == "IN_PROGRESS"
 
 
+def order_timeline(session, order_uuid):
+    return [
+        (event.from_status, event.to_status)
+        for event in services.get_order_timeline(order_uuid=order_uuid, db=session)
+    ]
+
+
+def test_order_timeline(session, order, create_user, create_order):
+    new_order = create_order(session, create_user(session))
+    assert order_timeline(session, new_order.uuid) == []
+
+    for update_status in ("IN_PROGRESS", "DELIVERED"):
+        services.update_order_status(
+            order_uuid=new_order.uuid, update_status=update_status, db=session
+        )
+    assert order_timeline(session, new_order.uuid) == [
+        ("PREPARING_FOR_DELIVERY", "IN_PROGRESS"),
+        ("IN_PROGRESS", "DELIVERED"),
+    ]
+
+    with pytest.raises(OrderNotFoundError):
+        services.get_order_timeline(order_uuid=order.uuid, db=session)
+
+    archived_order = models.ArchivedOrder(
+        uuid=uuid4(),
+        user_uuid=uuid4(),
+        delivery_status="DELIVERED",
+        archive_file="orders.jsonl.gz",
+        archive_offset=0,
+        created_at=new_order.created_at,
+    )
+    session.add(archived_order)
+    session.commit()
+    assert order_timeline(session, archived_order.uuid) == []
+
+
+def test_update_orders_status(mocker, session, create_user, create_order):
+    mocker.patch.object(services, "ORDER_STATUS_BATCH_SIZE", 2)
+    new_user = create_user(session)
+    orders = [create_order(session, new_user) for _ in range(3)]
+    services.update_order_status(
+        order_uuid=orders[0].uuid, update_status="CANCELLED", db=session
+    )
+
+    updated = services.update_orders_status(
+        order_uuids=[o.uuid for o in orders], update_status="IN_PROGRESS", db=session
+    )
+    assert set(updated) == {orders[1].uuid, orders[2].uuid}
+    assert order_timeline(session, orders[2].uuid) == [
+        ("PREPARING_FOR_DELIVERY", "IN_PROGRESS")
+    ]
+
+    session.refresh(orders[1])
+    assert orders[1].delivery_status == "IN_PROGRESS"
+    assert orders[1].version == 2
+
+    with pytest.raises(InvalidDeliveryStatusTransition):
+        services.update_orders_status(
+            order_uuids=[orders[1].uuid], update_status="CANCELLED", db=session
+        )
+
+
+def test_order_lookups_are_bounded_by_the_uuid7_time(
+    session, create_user, create_order
+):
+    new_order = create_order(session, create_user(session))
+
+    lower, upper = providers._created_at_range(
+        models.Order.created_at, [new_order.uuid]
+    )
+    assert lower.right.value < uuid7_time(new_order.uuid) < upper.right.value
+    assert providers._created_at_range(models.Order.created_at, [uuid4()]) == []
+
+    found = providers.get_order_by_uuid(order_uuid=new_order.uuid, db=session)
+    assert found.uuid == new_order.uuid
+
+
+def test_set_orders_status_postgres_cte(mocker):
+    db = mocker.Mock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+
+    providers.set_orders_status(
+        order_uuids=[uuid4()],
+        from_status="PREPARING_FOR_DELIVERY",
+        to_status="IN_PROGRESS",
+        version=3,
+        db=db,
+    )
+
+    (statement,), _ = db.scalars.call_args
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = " ".join(str(compiled).split())
+    assert sql.startswith('WITH updated AS (UPDATE "order" SET delivery_status=')
+    assert 'AND "order".version = ' in sql
+    for value in ("PREPARING_FOR_DELIVERY", "IN_PROGRESS", 3):
+        assert value in compiled.params.values()
+    assert 'RETURNING "order".uuid)' in sql
+    assert (
+        "INSERT INTO order_status_event (order_uuid, from_status, to_status, "
+        "created_at) SELECT updated.uuid" in sql
+    )
+    assert sql.endswith("FROM updated RETURNING order_status_event.order_uuid")
+
+
+def test_search_orders(session, create_user, create_order):
+    new_user = create_user(session)
+    orders = [create_order(session, new_user) for _ in range(5)]
+    services.update_order_status(
+        order_uuid=orders[0].uuid, update_status="IN_PROGRESS", db=session
+    )
+
+    pages, cursor = [], None
+    while True:
+        page = services.search_orders(
+            email=new_user.email, page_size=2, cursor=cursor, db=session
+        )
+        pages.append([order.uuid for order in page["data"]])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert pages == [
+        [orders[4].uuid, orders[3].uuid],
+        [orders[2].uuid, orders[1].uuid],
+        [orders[0].uuid],
+    ]
+
+    in_progress = services.search_orders(
+        email=new_user.email, delivery_statuses=["IN_PROGRESS"], db=session
+    )
+    assert [order.uuid for order in in_progress["data"]] == [orders[0].uuid]
+
+    with pytest.raises(InvalidCursorError):
+        services.search_orders(cursor="not-a-cursor", db=session)
+
+
+def test_update_order_status_retries_concurrent_update(
+    session, create_user, create_order
+):
+    new_user = create_user(session)
+    new_order = create_order(session, new_user)
+
+    # another request changes the order after this session read it
+    with TestingSessionLocal() as other_session:
+        other_session.execute(
+            update(models.Order)
+            .where(models.Order.uuid == new_order.uuid)
+            .values(total_receipt=10, version=models.Order.version + 1)
+        )
+        other_session.commit()
+
+    services.update_order_status(
+        order_uuid=new_order.uuid, update_status="IN_PROGRESS", db=session
+    )
+    assert new_order.delivery_status == "IN_PROGRESS"
+    assert new_order.total_receipt == 10
+    assert new_order.version == 3
+
+
+def test_update_order_status_conflict(mocker, session, create_user, create_order):
+    new_user = create_user(session)
+    new_order = create_order(session, new_user)
+    change = mocker.patch(
+        "apps.market_api.services.DeliveryStateMachine.change",
+        side_effect=StaleDataError,
+    )
+
+    with pytest.raises(OrderUpdateConflictError):
+        services.update_order_status(
+            order_uuid=new_order.uuid, update_status="IN_PROGRESS", db=session
+        )
+    assert change.call_count == services.ORDER_UPDATE_ATTEMPTS
+
+
 def test_create_user(session, user):
     expected_user = services.create_user(
         first_name=user.first_name,
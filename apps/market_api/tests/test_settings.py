@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+import settings
+from apps.auth import utils
+from settings import Settings, get_settings
+
+REQUIRED = {"database_url": "sqlite://", "oauth2_secret_key": "secret"}
+
+
+def test_settings_are_cached():
+    assert get_settings() is get_settings()
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("BCRYPT_ROUNDS", "4")
+    monkeypatch.setenv("SLOW_QUERY_EXPLAIN", "false")
+
+    settings = Settings(_env_file=None, **REQUIRED)
+
+    assert settings.db_pool_size == 20
+    assert settings.bcrypt_rounds == 4
+    assert settings.slow_query_explain is False
+
+
+def test_env_file_is_anchored_to_the_project():
+    env_file = Settings.model_config["env_file"]
+
+    assert os.path.isabs(env_file)
+    assert os.path.dirname(env_file) == os.path.dirname(settings.__file__)
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("bcrypt_rounds", 3),
+        ("db_pool_size", 0),
+        ("slow_query_sample_rate", 2),
+        ("tracing_exporter", "jaeger"),
+    ],
+)
+def test_invalid_settings(field, value):
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None, **REQUIRED, **{field: value})
+
+
+def test_password_hash_uses_bcrypt_rounds(mocker):
+    mocker.patch.object(utils.settings, "bcrypt_rounds", 4)
+
+    hashed = utils.get_password_hash("password")
+
+    assert hashed.startswith("$2b$04$")
+    assert utils.verify_password("password", hashed)
@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from apps.market_api.exceptions import OrderNotFoundError
+from apps.market_api.single_flight import SingleFlight
+
+WAITERS = 4
+
+
+def run_concurrently(single_flight, func):
+    """starts a call and WAITERS identical ones while the first is running"""
+    release = threading.Event()
+    calls = []
+
+    def blocking_func():
+        calls.append(1)
+        release.wait(timeout=5)
+        return func()
+
+    with ThreadPoolExecutor(max_workers=WAITERS + 1) as executor:
+        futures = [executor.submit(single_flight.do, "key", blocking_func)]
+        while not calls:
+            time.sleep(0.001)
+        futures += [
+            executor.submit(single_flight.do, "key", blocking_func)
+            for _ in range(WAITERS)
+        ]
+        while single_flight._calls["key"].waiters < WAITERS:
+            time.sleep(0.001)
+        release.set()
+
+    return futures, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    result = object()
+
+    futures, calls = run_concurrently(SingleFlight("test"), lambda: result)
+
+    assert len(calls) == 1
+    assert all(future.result() is result for future in futures)
+
+
+def test_waiters_get_the_exception():
+    def not_found():
+        raise OrderNotFoundError()
+
+    futures, calls = run_concurrently(SingleFlight("test"), not_found)
+
+    assert len(calls) == 1
+    for future in futures:
+        with pytest.raises(OrderNotFoundError):
+            future.result()
+
+
+def test_results_are_not_kept():
+    single_flight = SingleFlight("test")
+
+    assert single_flight.do("key", lambda: 1) == 1
+    assert single_flight.do("key", lambda: 2) == 2
+    assert single_flight._calls == {}
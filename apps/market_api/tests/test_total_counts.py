@@ -0,0 +1,81 @@
+from uuid import uuid4
+
+import pytest
+
+from apps.market_api import providers, total_counts
+from apps.market_api.total_counts import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def clear_totals():
+    total_counts.totals.clear()
+
+
+def user_orders(session, user_uuid):
+    return providers.get_user_orders_by_user_uuid(user_uuid=user_uuid, db=session)
+
+
+def test_ttl_cache_expires(mocker):
+    monotonic = mocker.patch("apps.market_api.total_counts.time.monotonic")
+    monotonic.return_value = 100
+    cache = TTLCache(ttl=30, max_size=2)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    monotonic.return_value = 131
+    assert cache.get("a") is None
+
+    for key in ("a", "b", "c"):
+        cache.set(key, 1)
+    assert cache.get("a") is None
+    assert cache.get("c") == 1
+
+
+def test_total_count_is_cached(session, create_user, create_order):
+    new_user = create_user(session)
+    create_order(session, new_user)
+    query = user_orders(session, new_user.uuid)
+
+    assert total_counts.total_count(query, "exact") == (1, False)
+
+    create_order(session, new_user)
+    assert total_counts.total_count(query, "exact") == (1, False)
+    # without planner statistics the estimate is the exact count
+    assert total_counts.total_count(query, "estimate") == (2, False)
+    assert total_counts.total_count(query, "none") is None
+
+    no_orders = user_orders(session, uuid4())
+    assert total_counts.total_count(no_orders, "auto") == (0, False)
+
+
+def test_paginated_total(mocker, session, create_user, create_order):
+    new_user = create_user(session)
+    orders = [create_order(session, new_user) for _ in range(5)]
+    query = user_orders(session, new_user.uuid)
+    total_count = mocker.patch(
+        "apps.market_api.providers.total_count", wraps=total_counts.total_count
+    )
+
+    first_page = providers.get_paginated_data_by_query(query, 2, 1, "auto")
+    assert first_page["total"] == 5
+    assert not first_page["total_is_estimate"]
+    assert [order.uuid for order in first_page["data"]] == [
+        orders[4].uuid,
+        orders[3].uuid,
+    ]
+
+    # the last page holds the total, nothing is counted
+    last_page = providers.get_paginated_data_by_query(query, 2, 3, "auto")
+    assert [order.uuid for order in last_page["data"]] == [orders[0].uuid]
+    assert last_page["total"] == 5
+    assert total_count.call_count == 1
+
+    # the other pages agree with the last one's total from then on
+    create_order(session, new_user)
+    assert providers.get_paginated_data_by_query(query, 2, 1, "auto")["total"] == 5
+    providers.get_paginated_data_by_query(query, 4, 2, "auto")
+    assert providers.get_paginated_data_by_query(query, 2, 1, "auto")["total"] == 6
+    assert total_count.call_count == 3
+
+    assert providers.get_paginated_data_by_query(query, 2, 1)["total"] is None
@@ -0,0 +1,136 @@
+"""
+Total row counts for paginated responses.
+
+Modes:
+    exact     SELECT count(*) over the query, fine for small filtered sets
+    estimate  the planner's row estimate for the query (EXPLAIN), no rows are
+              read. Databases without one (SQLite) count exactly
+    auto      the estimate, or the exact count when the estimate is below
+              TOTAL_COUNT_EXACT_THRESHOLD
+
+Totals are cached per query, parameters and mode for TOTAL_COUNT_TTL_SECONDS,
+so paging through a list doesn't count it again on every page. The exact
+total read off a last page replaces the cached one, so the other pages agree
+with it from then on.
+"""
+
+import threading
+import time
+from typing import Literal
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from settings import get_settings
+
+TotalMode = Literal["none", "exact", "estimate", "auto"]
+
+TOTAL_COUNT_TTL_SECONDS = get_settings().total_count_ttl_seconds
+TOTAL_COUNT_EXACT_THRESHOLD = get_settings().total_count_exact_threshold
+MAX_CACHED_TOTALS = 10000
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, with its parameters bound"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class TTLCache:
+    def __init__(self, ttl: float, max_size: int = MAX_CACHED_TOTALS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, 0))
+            if expires_at < time.monotonic():
+                self._values.pop(key, None)
+                return None
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            if len(self._values) >= self.max_size:
+                # the oldest entry goes, dicts keep insertion order
+                self._values.pop(next(iter(self._values)))
+            self._values[key] = (value, time.monotonic() + self.ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+totals = TTLCache(ttl=TOTAL_COUNT_TTL_SECONDS)
+
+
+def exact_count(query: Query) -> int:
+    return query.order_by(None).count()
+
+
+def estimated_count(query: Query) -> tuple[int, bool]:
+    session = query.session
+    if session.get_bind().dialect.name != "postgresql":
+        return exact_count(query), False
+
+    plan = session.execute(Explain(query.order_by(None).statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"]), True
+
+
+def _cache_key(query: Query, mode: TotalMode) -> tuple:
+    bind = query.session.get_bind()
+    compiled = query.statement.compile(dialect=bind.dialect)
+    return (
+        str(bind.url),
+        mode,
+        str(compiled),
+        repr(sorted(compiled.params.items())),
+    )
+
+
+def remember_total(query: Query, mode: TotalMode, total: int) -> None:
+    """
+    Cache an exact total known without counting
+    :param query: Query without limit and offset
+    :param mode: TotalMode
+    :param total: int
+    """
+    if mode != "none":
+        totals.set(_cache_key(query, mode), (total, False))
+
+
+def total_count(query: Query, mode: TotalMode) -> tuple[int, bool] | None:
+    """
+    :param query: Query without limit and offset
+    :param mode: TotalMode
+    :return: (total, whether it is an estimate), None for mode "none"
+    """
+    if mode == "none":
+        return None
+
+    key = _cache_key(query, mode)
+    total = totals.get(key)
+    if total is not None:
+        return total
+
+    if mode == "exact":
+        total = (exact_count(query), False)
+    else:
+        total = estimated_count(query)
+        estimate, is_estimate = total
+        if mode == "auto" and is_estimate and estimate < TOTAL_COUNT_EXACT_THRESHOLD:
+            total = (exact_count(query), False)
+
+    totals.set(key, total)
+    return total
@@ -0,0 +1,109 @@
+from datetime import datetime
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from apps.auth.services import validate_admin_group
+from apps.market_api import services
+from apps.market_api.exceptions import (
+    InvalidCursorError,
+    InvalidDeliveryStatusTransition,
+)
+from apps.market_api.responses import (
+    APIInvalidCursorError,
+    APIInvalidDeliveryStatusTransition,
+)
+from apps.market_api.schema import (
+    BulkStatusSchema,
+    KeysetPaginatedResponse,
+    OrderSchema,
+)
+from database import get_db, get_read_db
+
+router = APIRouter(
+    prefix="/market-api/v1/admin", dependencies=[Depends(validate_admin_group)]
+)
+
+DBSession = Annotated[Session, Depends(get_db)]
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+DeliveryStatus = Literal[
+    "PREPARING_FOR_DELIVERY", "IN_PROGRESS", "DELIVERED", "CANCELLED"
+]
+
+
+def _export_orders(export_format: str):
+    # the request session is closed before the response is streamed, so the
+    # export runs on its own read-only session, on a replica when there are
+    # any, and doesn't hold a primary connection for the whole download
+    read_db = get_read_db()
+    try:
+        yield from services.export_orders(export_format=export_format, db=next(read_db))
+    finally:
+        read_db.close()
+
+
+@router.get(
+    "/orders",
+    response_model=KeysetPaginatedResponse[OrderSchema],
+    tags=["Admin Orders"],
+)
+def search_orders(
+    db: ReadDBSession,
+    status: Annotated[list[DeliveryStatus] | None, Query()] = None,
+    created_from: datetime = None,
+    created_to: datetime = None,
+    updated_from: datetime = None,
+    updated_to: datetime = None,
+    email: str = None,
+    min_total: Annotated[float | None, Query(ge=0)] = None,
+    page_size: Annotated[int, Query(ge=1, le=500)] = 50,
+    cursor: str = None,
+):
+    try:
+        orders = services.search_orders(
+            db=db,
+            page_size=page_size,
+            cursor=cursor,
+            delivery_statuses=status,
+            created_from=created_from,
+            created_to=created_to,
+            updated_from=updated_from,
+            updated_to=updated_to,
+            email=email,
+            min_total=min_total,
+        )
+    except InvalidCursorError:
+        return APIInvalidCursorError()
+
+    return orders
+
+
+@router.get("/orders/export", tags=["Admin Orders"])
+def export_orders(
+    export_format: Annotated[
+        Literal["ndjson", "csv"], Query(alias="format")
+    ] = "ndjson",
+):
+    return StreamingResponse(
+        _export_orders(export_format=export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=orders.{export_format}"},
+    )
+
+
+@router.post("/orders/status", tags=["Admin Orders"])
+def update_orders_status(request_data: BulkStatusSchema, db: DBSession):
+    try:
+        order_uuids = services.update_orders_status(
+            order_uuids=request_data.order_uuids,
+            update_status=request_data.update_status,
+            db=db,
+        )
+    except InvalidDeliveryStatusTransition:
+        return APIInvalidDeliveryStatusTransition()
+
+    return {"count": len(order_uuids), "order_uuids": order_uuids}
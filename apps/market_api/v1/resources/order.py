@@ -9,17 +9,23 @@ from apps.market_api import services
 from apps.market_api.exceptions import (
     InvalidDeliveryStatusTransition,
     OrderNotFoundError,
+    OrderUpdateConflictError,
+    ProductOutOfStockError,
 )
 from apps.market_api.responses import (
     APIInvalidDeliveryStatusTransition,
     APIOrderDoesNotExistError,
+    APIOrderUpdateConflictError,
+    APIProductOutOfStockError,
 )
-from apps.market_api.schema import OrderSchema, StatusSchema
+from apps.market_api.schema import OrderSchema, OrderStatusEventSchema, StatusSchema
 from apps.market_api.send_email import send_email
-from database import get_db
+from apps.monitoring import tracing
+from database import get_db, get_read_db
 
 router = APIRouter(prefix="/market-api/v1", dependencies=[Depends(get_current_user)])
 DBSession = Annotated[Session, Depends(get_db)]
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
 
 
 @router.get(
@@ -27,15 +33,32 @@ DBSession = Annotated[Session, Depends(get_db)]
     tags=["Orders"],
     response_model=OrderSchema,
 )
-def get_order(order_uuid: UUID, db: DBSession):
+def get_order(order_uuid: UUID, db: ReadDBSession):
     try:
         order = services.get_order_by_uuid(order_uuid=order_uuid, db=db)
     except OrderNotFoundError:
-        return APIOrderDoesNotExistError()
+        try:
+            order = services.get_archived_order_by_uuid(order_uuid=order_uuid, db=db)
+        except OrderNotFoundError:
+            return APIOrderDoesNotExistError()
 
     return order
 
 
+@router.get(
+    "/orders/{order_uuid}/timeline",
+    tags=["Orders"],
+    response_model=list[OrderStatusEventSchema],
+)
+def get_order_timeline(order_uuid: UUID, db: ReadDBSession):
+    try:
+        events = services.get_order_timeline(order_uuid=order_uuid, db=db)
+    except OrderNotFoundError:
+        return APIOrderDoesNotExistError()
+
+    return events
+
+
 @router.post(
     "/orders/{order_uuid}",
     tags=["Orders"],
@@ -54,7 +77,7 @@ def update_order_delivery_status(
         user = services.get_user_by_uuid(user_uuid=order.user_uuid, db=db)
 
         background_tasks.add_task(
-            send_email,
+            tracing.bind_context(send_email),
             email_to=user.email,
             order_uuid=order.uuid,
             username=user.first_name,
@@ -64,5 +87,9 @@ def update_order_delivery_status(
         return APIOrderDoesNotExistError()
     except InvalidDeliveryStatusTransition:
         return APIInvalidDeliveryStatusTransition()
+    except OrderUpdateConflictError:
+        return APIOrderUpdateConflictError()
+    except ProductOutOfStockError:
+        return APIProductOutOfStockError()
 
     return order
@@ -6,16 +6,25 @@ from sqlalchemy.orm import Session
 
 from apps.auth.services import get_current_user
 from apps.market_api import services
-from apps.market_api.exceptions import DeleteProductsIsNotAvailable, OrderNotFoundError
+from apps.market_api.exceptions import (
+    DeleteProductsIsNotAvailable,
+    OrderNotFoundError,
+    OrderUpdateConflictError,
+    ProductOutOfStockError,
+)
 from apps.market_api.responses import (
     APIDeleteProductsIsNotAvailableError,
     APIOrderDoesNotExistError,
+    APIOrderUpdateConflictError,
+    APIProductOutOfStockError,
 )
 from apps.market_api.schema import AddOrderProductsSchema, PaginatedResponse, Product
-from database import get_db
+from apps.market_api.total_counts import TotalMode
+from database import get_db, get_read_db
 
 router = APIRouter(prefix="/market-api/v1", dependencies=[Depends(get_current_user)])
 DBSession = Annotated[Session, Depends(get_db)]
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
 
 
 @router.get(
@@ -25,11 +34,12 @@ DBSession = Annotated[Session, Depends(get_db)]
 )
 def get_order_products(
     order_uuid: UUID,
-    db: DBSession,
+    db: ReadDBSession,
     page: Annotated[int, Query(ge=1)] = 1,
+    total: TotalMode = "none",
 ):
     order_products = services.get_paginated_products_data_by_order_uuid(
-        order_uuid=order_uuid, page_num=page, db=db
+        order_uuid=order_uuid, page_num=page, total_mode=total, db=db
     )
     return order_products
 
@@ -50,6 +60,10 @@ def add_order_products(
         )
     except OrderNotFoundError:
         return APIOrderDoesNotExistError()
+    except OrderUpdateConflictError:
+        return APIOrderUpdateConflictError()
+    except ProductOutOfStockError:
+        return APIProductOutOfStockError()
 
 
 @router.delete("/orders/{order_uuid}/products", tags=["Order Products"])
@@ -66,3 +80,5 @@ def delete_order_products(
         return APIOrderDoesNotExistError()
     except DeleteProductsIsNotAvailable:
         return APIDeleteProductsIsNotAvailableError()
+    except OrderUpdateConflictError:
+        return APIOrderUpdateConflictError()
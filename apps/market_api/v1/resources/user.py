@@ -18,16 +18,17 @@ from apps.market_api.responses import (
     APIUserNotFoundError,
 )
 from apps.market_api.schema import AddUserSchema, UpdateUserContactInfoSchema, User
-from database import get_db
+from database import get_db, get_read_db
 
 router = APIRouter(prefix="/market-api/v1")
 DBSession = Annotated[Session, Depends(get_db)]
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
 
 
 @router.get(
     "/users/{user_uuid}", tags=["Users"], dependencies=[Depends(get_current_user)]
 )
-def get_user(user_uuid, db: DBSession):
+def get_user(user_uuid: UUID, db: ReadDBSession):
     user = services.get_user_by_uuid(user_uuid=user_uuid, db=db)
     return user
 
@@ -6,23 +6,35 @@ from sqlalchemy.orm import Session
 
 from apps.auth.services import get_current_user
 from apps.market_api import services
-from apps.market_api.exceptions import CancelOrderIsNotAvailable, OrderNotFoundError
+from apps.market_api.exceptions import (
+    CancelOrderIsNotAvailable,
+    OrderNotFoundError,
+    OrderUpdateConflictError,
+    ProductOutOfStockError,
+)
 from apps.market_api.responses import (
     APICancelOrderIsNotAvailableError,
     APIOrderDoesNotExistError,
+    APIOrderUpdateConflictError,
+    APIProductOutOfStockError,
 )
 from apps.market_api.schema import CreateOrderSchema, OrderSchema, PaginatedResponse
-from database import get_db
+from apps.market_api.total_counts import TotalMode
+from database import get_db, get_read_db
 
 router = APIRouter(prefix="/market-api/v1", dependencies=[Depends(get_current_user)])
 DBSession = Annotated[Session, Depends(get_db)]
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
 
 
 @router.post("/users/{user_uuid}/orders/", tags=["User Orders"])
 def create_user_order(user_uuid: UUID, request_data: CreateOrderSchema, db: DBSession):
-    order = services.create_order_with_products(
-        user_uuid=user_uuid, product_uuids=request_data.product_uuids, db=db
-    )
+    try:
+        order = services.create_order_with_products(
+            user_uuid=user_uuid, product_uuids=request_data.product_uuids, db=db
+        )
+    except ProductOutOfStockError:
+        return APIProductOutOfStockError()
     return order
 
 
@@ -33,11 +45,12 @@ def create_user_order(user_uuid: UUID, request_data: CreateOrderSchema, db: DBSe
 )
 def get_user_orders(
     user_uuid: UUID,
-    db: DBSession,
+    db: ReadDBSession,
     page: Annotated[int, Query(ge=1)] = 1,
+    total: TotalMode = "none",
 ):
     user_orders = services.get_paginated_user_orders(
-        user_uuid=user_uuid, page_num=page, db=db
+        user_uuid=user_uuid, page_num=page, total_mode=total, db=db
     )
     return user_orders
 
@@ -54,3 +67,5 @@ def delete_user_order(user_uuid: UUID, order_uuid: UUID, db: DBSession):
         return APIOrderDoesNotExistError()
     except CancelOrderIsNotAvailable:
         return APICancelOrderIsNotAvailableError()
+    except OrderUpdateConflictError:
+        return APIOrderUpdateConflictError()
@@ -0,0 +1,2 @@
+class ProfilerBusyError(Exception):
+    pass
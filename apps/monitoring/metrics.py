@@ -0,0 +1,94 @@
+"""
+Prometheus metrics, exposed in text format by GET /metrics.
+
+Under gunicorn (see gunicorn.conf.py) every worker writes its metrics to
+PROMETHEUS_MULTIPROC_DIR and /metrics aggregates all of them.
+"""
+
+import os
+
+from anyio import to_thread
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+from sqlalchemy.pool import QueuePool
+
+from database import engine
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status_code"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+# refreshed by the worker serving the scrape, one series per worker
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Database pool connections by state",
+    ["state"],
+    multiprocess_mode="liveall",
+)
+THREADPOOL_THREADS_BUSY = Gauge(
+    "threadpool_threads_busy",
+    "Worker threads running sync endpoints and dependencies (bcrypt, ORM)",
+    multiprocess_mode="liveall",
+)
+THREADPOOL_TASKS_WAITING = Gauge(
+    "threadpool_tasks_waiting",
+    "Sync calls queued for a free worker thread",
+    multiprocess_mode="liveall",
+)
+EMAIL_SEND_LATENCY = Histogram(
+    "email_send_duration_seconds", "Order status email send latency", ["outcome"]
+)
+COALESCED_READS = Counter(
+    "coalesced_reads_total",
+    "Reads served by joining an identical call already in flight",
+    ["operation"],
+)
+ORDER_UPDATE_CONFLICTS = Counter(
+    "order_update_conflicts_total",
+    "Order updates retried because the order changed concurrently",
+    ["operation"],
+)
+ORDER_STATUS_TRANSITIONS = Counter(
+    "order_status_transitions_total",
+    "Order delivery status transitions",
+    ["from_status", "to_status"],
+)
+
+
+def registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def route_template(scope: dict) -> str:
+    route = scope.get("route")
+    return route.path if route else "unmatched"
+
+
+def update_runtime_gauges() -> None:
+    """refresh the gauges read at scrape time, must run in the event loop"""
+    if isinstance(engine.pool, QueuePool):
+        DB_POOL_CONNECTIONS.labels("size").set(engine.pool.size())
+        DB_POOL_CONNECTIONS.labels("checked_out").set(engine.pool.checkedout())
+        DB_POOL_CONNECTIONS.labels("checked_in").set(engine.pool.checkedin())
+        DB_POOL_CONNECTIONS.labels("overflow").set(engine.pool.overflow())
+
+    threadpool = to_thread.current_default_thread_limiter().statistics()
+    THREADPOOL_THREADS_BUSY.set(threadpool.borrowed_tokens)
+    THREADPOOL_TASKS_WAITING.set(threadpool.tasks_waiting)
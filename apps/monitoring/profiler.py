@@ -0,0 +1,234 @@
+"""
+In-process sampling profiler, captured on demand from the admin endpoints.
+
+A background thread reads the Python stack of every thread of the worker
+with sys._current_frames() at a fixed interval. Native code (bcrypt hashing,
+pydantic-core validation, the database driver) is attributed to the Python
+frame calling it, so time spent there shows up under the caller. Nothing
+runs while no profile is being captured: the request middleware only checks
+`request_profile is None`.
+
+Profiles are exported as collapsed stacks (flamegraph.pl, speedscope) or in
+the speedscope JSON format.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+
+import anyio
+
+from apps.monitoring.exceptions import ProfilerBusyError
+
+DEFAULT_INTERVAL = 0.005
+MAX_STACK_DEPTH = 128
+# leaf frames of threads waiting for work, left out of the samples
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+# profile of the next matching requests, None while not profiling
+request_profile = None
+_lock = threading.Lock()
+_busy = False
+
+
+def _frame_label(frame) -> tuple[str, str, int]:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+def _is_idle(frame) -> bool:
+    filename = frame.f_code.co_filename.rsplit("/", 1)[-1]
+    return (filename, frame.f_code.co_name) in IDLE_FRAMES
+
+
+class Sampler:
+    """Stack samples of every thread but its own, root frame first"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self.paused = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profiler-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def sample(self) -> None:
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or _is_idle(frame):
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self.paused:
+                self.sample()
+
+
+class RequestProfile:
+    """Samples the worker while one of the next matching requests runs"""
+
+    def __init__(self, route: str, requests: int, interval: float):
+        self.route = route
+        self.remaining = requests
+        self.in_flight = 0
+        self.sampler = Sampler(interval=interval)
+        self.sampler.paused = True
+        self.done = anyio.Event()
+
+    def claim(self, scope: dict) -> bool:
+        """called by the middleware on the event loop, before the request runs"""
+        if self.remaining <= 0 or _match_route(scope) != self.route:
+            return False
+
+        self.remaining -= 1
+        self.in_flight += 1
+        self.sampler.paused = False
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self.sampler.paused = True
+            if self.remaining <= 0:
+                self.done.set()
+
+
+def _match_route(scope: dict) -> str | None:
+    from starlette.routing import Match
+
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+def _acquire() -> None:
+    global _busy
+
+    with _lock:
+        if _busy:
+            raise ProfilerBusyError()
+        _busy = True
+
+
+def _release() -> None:
+    global _busy
+
+    with _lock:
+        _busy = False
+
+
+async def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL) -> Sampler:
+    """
+    Sample the whole worker for the given number of seconds
+    :param seconds: float
+    :param interval: float seconds between samples
+    :return: Sampler
+    """
+    _acquire()
+    sampler = Sampler(interval=interval)
+    try:
+        sampler.start()
+        await anyio.sleep(seconds)
+    finally:
+        sampler.stop()
+        _release()
+    return sampler
+
+
+async def profile_requests(
+    route: str, requests: int, timeout: float, interval: float = DEFAULT_INTERVAL
+) -> tuple[Sampler, int]:
+    """
+    Sample the worker while each of the next matching requests runs. Requests
+    handled concurrently by the same worker are sampled too
+    :param route: str route template, e.g. /market-api/v1/orders/{order_uuid}
+    :param requests: int
+    :param timeout: float seconds to wait for the requests
+    :return: tuple[Sampler, int] sampler and number of requests profiled
+    """
+    global request_profile
+
+    _acquire()
+    profile = RequestProfile(route=route, requests=requests, interval=interval)
+    try:
+        profile.sampler.start()
+        request_profile = profile
+        with anyio.move_on_after(timeout):
+            await profile.done.wait()
+    finally:
+        request_profile = None
+        profile.sampler.stop()
+        _release()
+    return profile.sampler, requests - max(profile.remaining, 0)
+
+
+def _frame_name(name: str, filename: str, line: int) -> str:
+    return f"{name} ({filename}:{line})"
+
+
+def to_collapsed(sampler: Sampler) -> str:
+    """one `frame;frame;frame count` line per distinct stack"""
+    return "".join(
+        ";".join(_frame_name(*frame) for frame in stack) + f" {count}\n"
+        for stack, count in sampler.stacks.most_common()
+    )
+
+
+def to_speedscope(sampler: Sampler, name: str = "profile") -> dict:
+    frames = {}
+    samples = []
+    weights = []
+    for stack, count in sampler.stacks.most_common():
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(round(count * sampler.interval, 6))
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "market-api",
+        "shared": {
+            "frames": [
+                {"name": frame_name, "file": filename, "line": line}
+                for frame_name, filename, line in frames
+            ]
+        },
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
@@ -0,0 +1,8 @@
+from fastapi import status
+
+from apps.market_api.responses import BaseErrorResponse
+
+
+class APIProfilerBusyError(BaseErrorResponse):
+    status_code = status.HTTP_409_CONFLICT
+    error = "API_PROFILER_BUSY"
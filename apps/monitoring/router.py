@@ -0,0 +1,85 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from apps.auth.services import validate_admin_group
+from apps.monitoring import metrics, profiler, slow_queries
+from apps.monitoring.exceptions import ProfilerBusyError
+from apps.monitoring.responses import APIProfilerBusyError
+
+router = APIRouter()
+admin_router = APIRouter(
+    prefix="/market-api/v1/admin", dependencies=[Depends(validate_admin_group)]
+)
+
+ProfileFormat = Annotated[Literal["collapsed", "speedscope"], Query(alias="format")]
+Interval = Annotated[float, Query(ge=1, le=1000)]
+
+
+@router.get("/metrics", tags=["Monitoring"], include_in_schema=False)
+async def get_metrics():
+    metrics.update_runtime_gauges()
+    return Response(
+        content=generate_latest(metrics.registry()), media_type=CONTENT_TYPE_LATEST
+    )
+
+
+def _profile_response(sampler: profiler.Sampler, profile_format: str, name: str):
+    if profile_format == "speedscope":
+        return JSONResponse(
+            profiler.to_speedscope(sampler, name=name),
+            headers={
+                "Content-Disposition": "attachment; filename=profile.speedscope.json"
+            },
+        )
+    return PlainTextResponse(
+        profiler.to_collapsed(sampler),
+        headers={"Content-Disposition": "attachment; filename=profile.collapsed"},
+    )
+
+
+@admin_router.get("/profile", tags=["Monitoring"])
+async def profile_worker(
+    seconds: Annotated[float, Query(gt=0, le=300)] = 10,
+    profile_format: ProfileFormat = "collapsed",
+    interval_ms: Interval = 5,
+):
+    """Sample every thread of the worker handling this request for N seconds"""
+    try:
+        sampler = await profiler.profile_for(
+            seconds=seconds, interval=interval_ms / 1000
+        )
+    except ProfilerBusyError:
+        return APIProfilerBusyError()
+
+    return _profile_response(sampler, profile_format, name=f"worker {seconds}s")
+
+
+@admin_router.get("/profile/requests", tags=["Monitoring"])
+async def profile_requests(
+    route: str,
+    requests: Annotated[int, Query(ge=1, le=1000)] = 10,
+    timeout: Annotated[float, Query(gt=0, le=300)] = 60,
+    profile_format: ProfileFormat = "collapsed",
+    interval_ms: Interval = 1,
+):
+    """
+    Profile the next N requests to a route template (e.g.
+    /market-api/v1/orders/{order_uuid}) handled by the same worker
+    """
+    try:
+        sampler, profiled = await profiler.profile_requests(
+            route=route, requests=requests, timeout=timeout, interval=interval_ms / 1000
+        )
+    except ProfilerBusyError:
+        return APIProfilerBusyError()
+
+    return _profile_response(sampler, profile_format, name=f"{profiled} x {route}")
+
+
+@admin_router.get("/slow-queries", tags=["Monitoring"])
+def get_slow_queries(limit: Annotated[int, Query(ge=1, le=100)] = 20):
+    """Latest slow queries captured by this worker, newest first"""
+    return list(slow_queries.recent)[::-1][:limit]
@@ -0,0 +1,154 @@
+"""
+Slow-query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are captured with their
+parameters by the engine hooks in database.py. Captures are sampled
+(SLOW_QUERY_SAMPLE_RATE) and rate limited (SLOW_QUERY_MAX_PER_MINUTE) so a
+regression can't flood the log.
+
+On Postgres, slow SELECTs (not locking ones) are explained with EXPLAIN (ANALYZE, BUFFERS) on
+a separate connection in a background thread, so the request that ran the
+query doesn't wait for it.
+
+Captured queries are written as JSON lines to SLOW_QUERY_LOG_FILE (rotated)
+and kept in memory for GET /market-api/v1/admin/slow-queries.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from settings import get_settings
+
+settings = get_settings()
+SLOW_QUERY_THRESHOLD = settings.slow_query_threshold_ms / 1000
+SLOW_QUERY_SAMPLE_RATE = settings.slow_query_sample_rate
+SLOW_QUERY_MAX_PER_MINUTE = settings.slow_query_max_per_minute
+SLOW_QUERY_EXPLAIN = settings.slow_query_explain
+SLOW_QUERY_LOG_FILE = settings.slow_query_log_file
+SLOW_QUERY_BUFFER_SIZE = 100
+
+EXPLAIN_TIMEOUT_MS = 30000
+MAX_PARAMETERS_LENGTH = 2000
+
+logger = logging.getLogger("market_api.slow_queries")
+recent = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+
+_lock = threading.Lock()
+_captured_at = deque()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+_handler = None
+
+
+def _allow() -> bool:
+    """sampling, then at most SLOW_QUERY_MAX_PER_MINUTE captures a minute"""
+    if random.random() >= SLOW_QUERY_SAMPLE_RATE:
+        return False
+
+    now = time.monotonic()
+    with _lock:
+        while _captured_at and now - _captured_at[0] > 60:
+            _captured_at.popleft()
+        if len(_captured_at) >= SLOW_QUERY_MAX_PER_MINUTE:
+            return False
+        _captured_at.append(now)
+    return True
+
+
+def _write(record: dict) -> None:
+    global _handler
+
+    if SLOW_QUERY_LOG_FILE and _handler is None:
+        _handler = RotatingFileHandler(
+            SLOW_QUERY_LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5
+        )
+        logger.addHandler(_handler)
+        logger.setLevel(logging.WARNING)
+
+    recent.append(record)
+    logger.warning(json.dumps(record, default=str))
+
+
+def explain(engine, statement: str, parameters) -> str:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) a statement on its own connection. ANALYZE
+    runs the statement, so it is only used for SELECTs and always rolled back
+    :param engine: Engine
+    :param statement: str driver level SQL, as passed to the cursor
+    :param parameters: the statement parameters
+    :return: str query plan
+    """
+    with engine.connect() as conn:
+        with conn.begin() as transaction:
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            rows = conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+            ).all()
+            transaction.rollback()
+
+    return "\n".join(row[0] for row in rows)
+
+
+def _explain_and_write(engine, record: dict, parameters) -> None:
+    try:
+        record["plan"] = explain(engine, record["statement"], parameters)
+    except Exception as e:
+        record["plan_error"] = repr(e)
+    _write(record)
+
+
+# EXPLAIN ANALYZE of a locking SELECT would wait on, then take, the row locks
+# the original transaction holds
+LOCKING_CLAUSE = re.compile(
+    r"\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE
+)
+
+
+def _explainable(engine, statement: str, executemany: bool) -> bool:
+    return (
+        SLOW_QUERY_EXPLAIN
+        and engine.dialect.name == "postgresql"
+        and not executemany
+        # a WITH can hold an INSERT, UPDATE or DELETE that EXPLAIN ANALYZE runs
+        and statement.lstrip()[:6].upper() == "SELECT"
+        and not LOCKING_CLAUSE.search(statement)
+    )
+
+
+def capture(
+    engine, statement: str, parameters, duration: float, executemany: bool
+) -> None:
+    """
+    Called by the engine hooks for statements slower than SLOW_QUERY_THRESHOLD
+    :param engine: Engine
+    :param statement: str
+    :param parameters: statement parameters
+    :param duration: float seconds
+    :param executemany: bool
+    """
+    if statement.lstrip().upper().startswith("EXPLAIN") or not _allow():
+        return
+
+    record = {
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration * 1000, 2),
+        "statement": statement,
+        "parameters": (
+            f"<{len(parameters)} parameter sets>"
+            if executemany
+            else repr(parameters)[:MAX_PARAMETERS_LENGTH]
+        ),
+        "plan": None,
+    }
+
+    if _explainable(engine, statement, executemany):
+        _executor.submit(_explain_and_write, engine, record, parameters)
+    else:
+        _write(record)
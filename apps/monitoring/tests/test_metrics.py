@@ -0,0 +1,50 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from apps.auth.services import get_current_user
+from apps.monitoring import metrics
+from main import app
+
+client = TestClient(app)
+
+
+async def mock_user():
+    return {"user": {"name": "test-user"}}
+
+
+app.dependency_overrides[get_current_user] = mock_user
+
+
+def test_get_metrics(mocker):
+    mocker.patch(
+        "apps.market_api.v1.resources.product.services.get_paginated_products",
+        return_value={"count": 0, "data": []},
+    )
+    client.get("/market-api/v1/products", headers={"Authorization": "Bearer token"})
+    client.get("/not-a-route")
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/market-api/v1/products",status_code="200"}'
+    ) in response.text
+    assert 'route="unmatched"' in response.text
+    assert "threadpool_tasks_waiting" in response.text
+
+
+def test_route_template():
+    assert metrics.route_template({}) == "unmatched"
+
+
+def test_registry_multiprocess(monkeypatch, tmp_path):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    assert metrics.registry() is REGISTRY
+
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert metrics.registry() is not REGISTRY
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import anyio
+import httpx
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from apps.auth.services import get_current_user, validate_admin_group
+from apps.monitoring import profiler
+from main import app
+
+client = TestClient(app)
+
+
+async def mock_user():
+    return {"user": {"name": "test-user"}}
+
+
+app.dependency_overrides[get_current_user] = mock_user
+app.dependency_overrides[validate_admin_group] = mock_user
+
+FAKE_TOKEN = "Bearer token-123"
+URL_PATH = "/market-api/v1/admin/profile"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_records_busy_threads():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,))
+    thread.start()
+
+    sampler = profiler.Sampler(interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    thread.join()
+
+    assert sampler.samples > 0
+    assert any(stack[-1][0] == "busy_loop" for stack in sampler.stacks)
+    assert "busy_loop (" in profiler.to_collapsed(sampler)
+
+
+def test_to_speedscope():
+    sampler = profiler.Sampler(interval=0.01)
+    sampler.stacks[(("main", "app.py", 1), ("handler", "app.py", 10))] = 3
+    sampler.stacks[(("main", "app.py", 1),)] = 1
+
+    speedscope = profiler.to_speedscope(sampler, name="test")
+
+    assert speedscope["shared"]["frames"] == [
+        {"name": "main", "file": "app.py", "line": 1},
+        {"name": "handler", "file": "app.py", "line": 10},
+    ]
+    assert speedscope["profiles"][0]["samples"] == [[0, 1], [0]]
+    assert speedscope["profiles"][0]["weights"] == [0.03, 0.01]
+    assert profiler.to_collapsed(sampler) == (
+        "main (app.py:1);handler (app.py:10) 3\nmain (app.py:1) 1\n"
+    )
+
+
+def test_profile_worker():
+    headers = {"Authorization": FAKE_TOKEN}
+
+    response = client.get(URL_PATH, params={"seconds": 0.05}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+
+    response = client.get(
+        URL_PATH, params={"seconds": 0.05, "format": "speedscope"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["profiles"][0]["type"] == "sampled"
+    assert profiler.request_profile is None
+
+
+@pytest.mark.anyio
+async def test_profile_requests(mocker):
+    mocker.patch(
+        "apps.market_api.v1.resources.product.services.get_paginated_products",
+        return_value={"count": 0, "data": []},
+    )
+    headers = {"Authorization": FAKE_TOKEN}
+    responses = {}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+
+        async def profile():
+            responses["profile"] = await async_client.get(
+                f"{URL_PATH}/requests",
+                params={"route": "/market-api/v1/products", "requests": 2},
+                headers=headers,
+            )
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(profile)
+            while profiler.request_profile is None:
+                await anyio.sleep(0.01)
+
+            await async_client.get("/market-api/v1/users/not-profiled")
+            for _ in range(2):
+                await async_client.get("/market-api/v1/products", headers=headers)
+
+    assert responses["profile"].status_code == status.HTTP_200_OK
+    assert profiler.request_profile is None
+
+
+@pytest.mark.anyio
+async def test_profile_busy():
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(async_client.get, f"{URL_PATH}?seconds=0.2")
+            await anyio.sleep(0.05)
+
+            response = await async_client.get(URL_PATH, params={"seconds": 0.05})
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json() == {"detail": "API_PROFILER_BUSY"}
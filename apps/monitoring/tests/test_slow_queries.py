@@ -0,0 +1,128 @@
+from unittest import mock
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from apps.auth.services import get_current_user, validate_admin_group
+from apps.monitoring import slow_queries
+from database import engine
+from main import app
+
+client = TestClient(app)
+
+
+async def mock_user():
+    return {"user": {"name": "test-user"}}
+
+
+app.dependency_overrides[get_current_user] = mock_user
+app.dependency_overrides[validate_admin_group] = mock_user
+
+FAKE_TOKEN = "Bearer token-123"
+URL_PATH = "/market-api/v1/admin/slow-queries"
+
+
+@pytest.fixture(autouse=True)
+def slow_query_log(mocker):
+    mocker.patch.object(slow_queries, "SLOW_QUERY_THRESHOLD", 0)
+    mocker.patch.object(slow_queries, "SLOW_QUERY_LOG_FILE", "")
+    mocker.patch.object(slow_queries, "_captured_at", slow_queries.deque())
+    slow_queries.recent.clear()
+    yield
+    slow_queries.recent.clear()
+
+
+def test_capture_slow_query():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :value"), {"value": 42})
+
+    (record,) = slow_queries.recent
+    assert record["statement"].startswith("SELECT")
+    assert "42" in record["parameters"]
+    assert record["duration_ms"] >= 0
+
+
+def test_capture_rate_limit(mocker):
+    mocker.patch.object(slow_queries, "SLOW_QUERY_MAX_PER_MINUTE", 2)
+
+    with engine.connect() as conn:
+        for _ in range(5):
+            conn.execute(text("SELECT 1"))
+
+    assert len(slow_queries.recent) == 2
+
+
+def test_capture_sampling(mocker):
+    mocker.patch.object(slow_queries, "SLOW_QUERY_SAMPLE_RATE", 0)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert len(slow_queries.recent) == 0
+
+
+def test_capture_explains_postgres_selects(mocker):
+    mock_submit = mocker.patch.object(slow_queries._executor, "submit")
+    postgres = mock.Mock()
+    postgres.dialect.name = "postgresql"
+
+    slow_queries.capture(
+        engine=postgres,
+        statement="SELECT * FROM product WHERE name ILIKE %(name)s",
+        parameters={"name": "%milk%"},
+        duration=0.5,
+        executemany=False,
+    )
+    slow_queries.capture(
+        engine=postgres,
+        statement="UPDATE product SET price = %(price)s",
+        parameters={"price": 1},
+        duration=0.5,
+        executemany=False,
+    )
+    slow_queries.capture(
+        engine=postgres,
+        statement="WITH updated AS (UPDATE product SET price = 1 RETURNING uuid) "
+        "SELECT count(*) FROM updated",
+        parameters={},
+        duration=0.5,
+        executemany=False,
+    )
+
+    assert mock_submit.call_count == 1
+    assert len(slow_queries.recent) == 2
+    assert slow_queries.recent[0]["statement"].startswith("UPDATE")
+    assert slow_queries.recent[1]["statement"].startswith("WITH")
+
+
+@pytest.mark.parametrize(
+    "lock", ["FOR UPDATE", "FOR NO KEY UPDATE", "FOR SHARE", "FOR KEY SHARE"]
+)
+def test_capture_skips_locking_selects(mocker, lock):
+    mock_submit = mocker.patch.object(slow_queries._executor, "submit")
+    postgres = mock.Mock()
+    postgres.dialect.name = "postgresql"
+
+    slow_queries.capture(
+        engine=postgres,
+        statement=f"SELECT * FROM product WHERE sku = %(sku)s\n {lock}",
+        parameters={"sku": "SKU-1"},
+        duration=0.5,
+        executemany=False,
+    )
+
+    mock_submit.assert_not_called()
+    assert len(slow_queries.recent) == 1
+
+
+def test_get_slow_queries():
+    slow_queries.recent.extend([{"statement": "SELECT 1"}, {"statement": "SELECT 2"}])
+
+    response = client.get(URL_PATH, headers={"Authorization": FAKE_TOKEN})
+    assert response.status_code == status.HTTP_200_OK
+    assert [record["statement"] for record in response.json()][:2] == [
+        "SELECT 2",
+        "SELECT 1",
+    ]
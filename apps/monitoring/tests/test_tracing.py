@@ -0,0 +1,114 @@
+import json
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from sqlalchemy import text
+
+from apps.auth.services import get_current_user
+from apps.monitoring import tracing
+from database import engine
+from main import app
+
+client = TestClient(app)
+
+
+async def mock_user():
+    return {"user": {"name": "test-user"}}
+
+
+app.dependency_overrides[get_current_user] = mock_user
+
+FAKE_TOKEN = "Bearer token-123"
+exporter = InMemorySpanExporter()
+
+
+@pytest.fixture(autouse=True)
+def spans():
+    tracing.setup_tracing(span_processor=SimpleSpanProcessor(exporter))
+    exporter.clear()
+    yield exporter
+    exporter.clear()
+
+
+def test_spans_across_layers(spans):
+    response = client.get(
+        f"/market-api/v1/orders/{uuid4()}", headers={"Authorization": FAKE_TOKEN}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    request = finished["HTTP GET /market-api/v1/orders/{order_uuid}"]
+    service = finished["services.get_order_by_uuid"]
+    provider = finished["providers.get_order_by_uuid"]
+
+    assert request.kind == trace.SpanKind.SERVER
+    assert request.attributes["http.response.status_code"] == 404
+    assert service.parent.span_id == request.context.span_id
+    assert provider.parent.span_id == service.context.span_id
+
+
+def test_database_spans(spans):
+    with tracing.tracer.start_as_current_span("provider") as provider:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    (query,) = [span for span in spans.get_finished_spans() if span.name == "db.SELECT"]
+    assert query.kind == trace.SpanKind.CLIENT
+    assert query.parent.span_id == provider.context.span_id
+    assert query.attributes["db.statement"] == "SELECT 1"
+    assert query.attributes["db.system"] == engine.dialect.name
+
+
+def test_incoming_trace_context(spans, mocker):
+    mocker.patch(
+        "apps.market_api.v1.resources.product.services.get_paginated_products",
+        return_value={"count": 0, "data": []},
+    )
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    client.get(
+        "/market-api/v1/products",
+        headers={
+            "Authorization": FAKE_TOKEN,
+            "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01",
+        },
+    )
+
+    (request,) = spans.get_finished_spans()
+    assert request.name == "HTTP GET /market-api/v1/products"
+    assert trace.format_trace_id(request.context.trace_id) == trace_id
+
+
+def test_bind_context(spans):
+    @tracing.traced("email")
+    def send():
+        pass
+
+    with tracing.tracer.start_as_current_span("request") as request:
+        task = tracing.bind_context(send)
+    task()
+
+    sent = next(
+        span for span in spans.get_finished_spans() if span.name == "email.send"
+    )
+    assert sent.parent.span_id == request.context.span_id
+
+
+def test_json_lines_file_exporter(spans, tmp_path):
+    with tracing.tracer.start_as_current_span("request"):
+        pass
+
+    path = tmp_path / "traces.jsonl"
+    file_exporter = tracing.JsonLinesFileSpanExporter(path=str(path))
+    file_exporter.export(spans.get_finished_spans())
+    file_exporter.export(spans.get_finished_spans())
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["name"] == "request"
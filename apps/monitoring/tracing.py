@@ -0,0 +1,173 @@
+"""
+OpenTelemetry tracing of the request path.
+
+Spans are opened for every layer a request goes through:
+    HTTP request (middleware) -> services -> providers -> SQL statements
+and for the order status emails sent from background tasks, which keep the
+trace of the request that scheduled them.
+
+Tracing is off by default. Set TRACING_EXPORTER to export the spans:
+    otlp    OTLP over HTTP, endpoint from OTEL_EXPORTER_OTLP_ENDPOINT
+            (default http://localhost:4318)
+    file    JSON Lines written to TRACING_FILE (default traces.jsonl)
+While it is off, `traced` functions are called directly.
+"""
+
+import contextlib
+import functools
+import inspect
+import json
+import threading
+from typing import Sequence
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+
+from settings import get_settings
+
+settings = get_settings()
+TRACING_EXPORTER = settings.tracing_exporter
+TRACING_FILE = settings.tracing_file
+SERVICE_NAME = settings.otel_service_name
+
+tracer = trace.get_tracer("market_api")
+enabled = False
+
+
+class JsonLinesFileSpanExporter(SpanExporter):
+    """Appends finished spans to a local file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(
+            json.dumps(json.loads(span.to_json()), separators=(",", ":")) + "\n"
+            for span in spans
+        )
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+
+def _exporter(name: str) -> SpanExporter:
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter()
+    if name == "file":
+        return JsonLinesFileSpanExporter(path=TRACING_FILE)
+    raise ValueError(f"unsupported TRACING_EXPORTER '{name}'")
+
+
+def setup_tracing(span_processor=None) -> None:
+    """
+    Install the tracer provider, once per process
+    :param span_processor: SpanProcessor, by default a batch processor for the
+        TRACING_EXPORTER exporter
+    """
+    global enabled
+
+    if enabled or (span_processor is None and TRACING_EXPORTER == "none"):
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(
+        span_processor or BatchSpanProcessor(_exporter(TRACING_EXPORTER))
+    )
+    trace.set_tracer_provider(provider)
+    enabled = True
+
+
+@contextlib.contextmanager
+def server_span(method: str, headers):
+    """
+    Span of an incoming request, continuing the trace of the caller when the
+    request carries a `traceparent` header. A no-op span while tracing is off
+    """
+    if not enabled:
+        yield trace.INVALID_SPAN
+        return
+
+    with tracer.start_as_current_span(
+        f"HTTP {method}",
+        context=propagate.extract(headers),
+        kind=trace.SpanKind.SERVER,
+        attributes={"http.request.method": method},
+    ) as span:
+        yield span
+
+
+def traced(layer: str):
+    """
+    Run the decorated function in a span named `<layer>.<function>`
+    :param layer: str, e.g. services, providers
+    """
+
+    def decorator(func):
+        name = f"{layer}.{func.__name__}"
+        attributes = {"code.namespace": func.__module__, "code.function": func.__name__}
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not enabled:
+                    return await func(*args, **kwargs)
+                with tracer.start_as_current_span(name, attributes=attributes):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with tracer.start_as_current_span(name, attributes=attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def bind_context(func):
+    """
+    Run `func` in the trace context current when it is bound, for work that
+    runs after the request span has ended (background tasks)
+    """
+    if not enabled:
+        return func
+
+    ctx = context.get_current()
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            token = context.attach(ctx)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                context.detach(token)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = context.attach(ctx)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            context.detach(token)
+
+    return wrapper
@@ -0,0 +1,87 @@
+"""
+Compare two benchmark result files, e.g. before and after a change:
+    python -m benchmarks.compare results/baseline.json results/candidate.json
+
+Prints the change of every metric per scenario. Latency increases or
+throughput drops above --threshold percent are flagged as regressions and
+make the command exit with status 1.
+"""
+
+import argparse
+import json
+import sys
+
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRICS = ("throughput_rps",)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(before: float, after: float) -> float | None:
+    if not before:
+        return None
+    return round((after - before) / before * 100, 1)
+
+
+def compare(baseline: dict, candidate: dict, threshold: float = 10) -> list[dict]:
+    """
+    :param baseline: dict results file
+    :param candidate: dict results file
+    :param threshold: float percent
+    :return: list[dict] one row per scenario and metric
+    """
+    rows = []
+    for scenario, before in baseline["results"].items():
+        after = candidate["results"].get(scenario)
+        if after is None:
+            continue
+
+        for metric in LATENCY_METRICS + THROUGHPUT_METRICS:
+            if metric not in before or metric not in after:
+                continue
+
+            percent = change(before[metric], after[metric])
+            if percent is None:
+                regression = False
+            elif metric in LATENCY_METRICS:
+                regression = percent > threshold
+            else:
+                regression = -percent > threshold
+
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "metric": metric,
+                    "before": before[metric],
+                    "after": after[metric],
+                    "change": percent,
+                    "regression": regression,
+                }
+            )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10)
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"baseline:  {baseline.get('commit')} {baseline.get('timestamp')}")
+    print(f"candidate: {candidate.get('commit')} {candidate.get('timestamp')}")
+
+    rows = compare(baseline, candidate, threshold=args.threshold)
+    for row in rows:
+        change_text = "n/a" if row["change"] is None else f"{row['change']:+.1f}%"
+        print(
+            f"{row['scenario']:<24} {row['metric']:<16} {row['before']:>10} "
+            f"{row['after']:>10} {change_text:>9}"
+            f"{'  REGRESSION' if row['regression'] else ''}"
+        )
+
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
@@ -0,0 +1,127 @@
+"""
+Import-time report of the app, from `python -X importtime`.
+
+Imports a module (main by default) in a fresh interpreter and prints the
+slowest imports by cumulative and self time:
+    python -m benchmarks.importtime --top 25
+    python -m benchmarks.importtime --runs 5 --save
+
+With --runs the module is imported several times and the median is
+reported, the first run also pays for cold file system caches.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.load_test import RESULTS_DIR, git_commit, save_results
+
+HEADER = "import time: self [us] | cumulative | imported package"
+
+
+def parse(stderr: str) -> list[dict]:
+    """
+    :param stderr: str output of python -X importtime
+    :return: list[dict] one row per imported module, in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line == HEADER:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return rows
+
+
+def measure(module: str) -> tuple[list[dict], float]:
+    """
+    Import `module` in a new interpreter
+    :return: tuple[list[dict], float] parsed rows and wall time in ms
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    if result.returncode != 0:
+        raise SystemExit(f"[FAIL] import {module}\n{result.stderr[-2000:]}")
+    return parse(result.stderr), wall_ms
+
+
+def median_rows(runs: list[list[dict]]) -> list[dict]:
+    by_module = {}
+    for rows in runs:
+        for row in rows:
+            by_module.setdefault(row["module"], []).append(row)
+
+    return [
+        {
+            "module": module,
+            "depth": rows[0]["depth"],
+            "self_ms": statistics.median(row["self_ms"] for row in rows),
+            "cumulative_ms": statistics.median(row["cumulative_ms"] for row in rows),
+        }
+        for module, rows in by_module.items()
+    ]
+
+
+def print_table(rows: list[dict], key: str, top: int) -> None:
+    print(f"\n{'module':<60} {'self ms':>10} {'cumulative ms':>14}")
+    for row in sorted(rows, key=lambda row: row[key], reverse=True)[:top]:
+        print(
+            f"{row['module']:<60} {row['self_ms']:>10.1f} {row['cumulative_ms']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--save", action="store_true", help="save the report as JSON")
+    args = parser.parse_args()
+
+    runs, wall_times = [], []
+    for _ in range(args.runs):
+        rows, wall_ms = measure(args.module)
+        runs.append(rows)
+        wall_times.append(wall_ms)
+
+    rows = median_rows(runs)
+    top_level = [row for row in rows if row["depth"] == 0]
+    print(f"import {args.module}: {statistics.median(wall_times):.0f} ms wall time")
+    print(f"{sum(row['cumulative_ms'] for row in top_level):.0f} ms importing")
+    print_table(rows, key="cumulative_ms", top=args.top)
+    print_table(rows, key="self_ms", top=args.top)
+
+    if args.save:
+        path = save_results(
+            {
+                "name": "importtime",
+                "commit": git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "module": args.module,
+                "runs": args.runs,
+                "wall_ms": round(statistics.median(wall_times), 1),
+                "modules": sorted(
+                    rows, key=lambda row: row["cumulative_ms"], reverse=True
+                ),
+            }
+        )
+        print("[OK] Results saved:", path)
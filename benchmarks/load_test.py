@@ -0,0 +1,354 @@
+"""
+Concurrent load test of every API endpoint.
+
+The profiling endpoints sample the worker for a fraction of a second and
+allow one profile at a time, so they run one request after the other.
+
+Seeds the database (see benchmarks/seed.py), drives each endpoint with
+concurrent clients, prints p50/p95/p99 latency and throughput and stores the
+results as JSON so runs can be compared with benchmarks/compare.py:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.load_test --seed
+
+Requests go to the app in-process by default (order status emails are not
+sent), or to a running server with --base-url.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from itertools import cycle
+from unittest import mock
+
+import httpx
+
+from benchmarks import seed as seeding
+from database import SessionLocal, engine
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class Context:
+    """Seeded rows used to build request urls"""
+
+    def __init__(self, requests: int):
+        from apps.market_api.models import Order, Product, User
+
+        db = SessionLocal()
+        self.users = [uuid for (uuid,) in db.query(User.uuid)]
+        self.products = [uuid for (uuid,) in db.query(Product.uuid).limit(1000)]
+        self.orders = db.query(Order.uuid, Order.user_uuid).all()
+        db.close()
+
+        self.requests = requests
+        self.read_orders = cycle(self.orders[:1000])
+        # write scenarios change or delete their order, each gets fresh ones
+        self.fresh_orders = iter(self.orders)
+        self.headers = {}
+
+    def fresh_order(self):
+        try:
+            return next(self.fresh_orders)
+        except StopIteration:
+            raise SystemExit("[FAIL] Not enough seeded orders, use a larger --orders")
+
+    def product(self, i: int):
+        return self.products[i % len(self.products)]
+
+    def user(self, i: int):
+        return self.users[i % len(self.users)]
+
+
+def _login(ctx, i):
+    return (
+        "POST",
+        "/api/v1/login",
+        {"data": {"username": seeding.ADMIN_EMAIL, "password": seeding.PASSWORD}},
+    )
+
+
+def _get_products(ctx, i):
+    return "GET", f"/market-api/v1/products?page={i % 50 + 1}", {}
+
+
+def _search_products(ctx, i):
+    return "GET", f"/market-api/v1/products?name={i % 100}", {}
+
+
+def _get_user(ctx, i):
+    return "GET", f"/market-api/v1/users/{ctx.user(i)}", {}
+
+
+def _create_user(ctx, i):
+    body = {
+        "first_name": "Load",
+        "last_name": "Test",
+        "phone_number": i,
+        "email": f"load-{time.time_ns()}-{i}@example.com",
+        "password": seeding.PASSWORD,
+    }
+    return "POST", "/market-api/v1/users", {"json": body}
+
+
+def _update_user(ctx, i):
+    body = {"phone_number": 5550000 + i}
+    return "PATCH", f"/market-api/v1/users/{ctx.user(i)}", {"json": body}
+
+
+def _get_user_orders(ctx, i):
+    return "GET", f"/market-api/v1/users/{ctx.user(i)}/orders?page=1", {}
+
+
+def _create_user_order(ctx, i):
+    body = {"product_uuids": [str(ctx.product(i)), str(ctx.product(i + 1))]}
+    return "POST", f"/market-api/v1/users/{ctx.user(i)}/orders/", {"json": body}
+
+
+def _get_order(ctx, i):
+    order_uuid, _ = next(ctx.read_orders)
+    return "GET", f"/market-api/v1/orders/{order_uuid}", {}
+
+
+def _get_order_products(ctx, i):
+    order_uuid, _ = next(ctx.read_orders)
+    return "GET", f"/market-api/v1/orders/{order_uuid}/products", {}
+
+
+def _add_order_products(ctx, i):
+    order_uuid, _ = ctx.fresh_order()
+    body = {"product_uuids": [str(ctx.product(i + 7))]}
+    return "POST", f"/market-api/v1/orders/{order_uuid}/products/", {"json": body}
+
+
+def _delete_order_products(ctx, i):
+    order_uuid, _ = ctx.fresh_order()
+    url = f"/market-api/v1/orders/{order_uuid}/products?product_uuids={ctx.product(i)}"
+    return "DELETE", url, {}
+
+
+def _update_order_status(ctx, i):
+    order_uuid, _ = ctx.fresh_order()
+    body = {"update_status": "IN_PROGRESS"}
+    return "POST", f"/market-api/v1/orders/{order_uuid}", {"json": body}
+
+
+def _delete_user_order(ctx, i):
+    order_uuid, user_uuid = ctx.fresh_order()
+    return "DELETE", f"/market-api/v1/users/{user_uuid}/orders/{order_uuid}", {}
+
+
+def _export_orders(ctx, i):
+    return "GET", "/market-api/v1/admin/orders/export", {}
+
+
+def _get_metrics(ctx, i):
+    return "GET", "/metrics", {}
+
+
+def _get_order_timeline(ctx, i):
+    order_uuid, _ = next(ctx.read_orders)
+    return "GET", f"/market-api/v1/orders/{order_uuid}/timeline", {}
+
+
+def _search_orders(ctx, i):
+    # a status filter, then the same filter with a minimum total
+    params = {"status": "PREPARING_FOR_DELIVERY", "page_size": 50}
+    if i % 2:
+        params["min_total"] = 10
+    return "GET", "/market-api/v1/admin/orders", {"params": params}
+
+
+def _update_orders_status(ctx, i):
+    body = {
+        "order_uuids": [str(ctx.fresh_order()[0]) for _ in range(5)],
+        "update_status": "IN_PROGRESS",
+    }
+    return "POST", "/market-api/v1/admin/orders/status", {"json": body}
+
+
+def _profile_worker(ctx, i):
+    params = {"seconds": 0.2, "interval_ms": 5}
+    return "GET", "/market-api/v1/admin/profile", {"params": params}
+
+
+def _profile_requests(ctx, i):
+    # nothing else is requested meanwhile, this times the wait and the report
+    params = {"route": "/market-api/v1/products", "requests": 1, "timeout": 0.2}
+    return "GET", "/market-api/v1/admin/profile/requests", {"params": params}
+
+
+def _get_slow_queries(ctx, i):
+    return "GET", "/market-api/v1/admin/slow-queries", {}
+
+
+SCENARIOS = {
+    "login": _login,
+    "get_products": _get_products,
+    "search_products": _search_products,
+    "get_user": _get_user,
+    "create_user": _create_user,
+    "update_user": _update_user,
+    "get_user_orders": _get_user_orders,
+    "create_user_order": _create_user_order,
+    "get_order": _get_order,
+    "get_order_products": _get_order_products,
+    "add_order_products": _add_order_products,
+    "delete_order_products": _delete_order_products,
+    "update_order_status": _update_order_status,
+    "delete_user_order": _delete_user_order,
+    "export_orders": _export_orders,
+    "get_metrics": _get_metrics,
+    "get_order_timeline": _get_order_timeline,
+    "search_orders": _search_orders,
+    "update_orders_status": _update_orders_status,
+    "profile_worker": _profile_worker,
+    "profile_requests": _profile_requests,
+    "get_slow_queries": _get_slow_queries,
+}
+# full table scans and profiles, run a handful of times only
+LIGHT_SCENARIOS = {"export_orders": 5, "profile_worker": 5, "profile_requests": 5}
+# one profile at a time per worker, concurrent ones would answer 409
+SERIAL_SCENARIOS = {"profile_worker", "profile_requests"}
+
+
+def percentile(cut_points: list[float], p: int) -> float:
+    return round(cut_points[p - 1] * 1000, 2)
+
+
+def summarize(latencies: list[float], errors: dict, elapsed: float) -> dict:
+    cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": percentile(cut_points, 50),
+        "p95_ms": percentile(cut_points, 95),
+        "p99_ms": percentile(cut_points, 99),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+async def run_scenario(client, ctx, scenario, requests: int, concurrency: int):
+    pending = iter(range(requests))
+    latencies = []
+    errors = {}
+
+    async def worker():
+        for i in pending:
+            method, url, kwargs = scenario(ctx, i)
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=ctx.headers, **kwargs)
+            latencies.append(time.perf_counter() - started)
+
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run(args) -> dict:
+    if args.base_url:
+        transport = None
+    else:
+        from main import app
+
+        # unhandled errors are reported as 500s instead of stopping the run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    ctx = Context(requests=args.requests)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url=args.base_url or "http://bench", timeout=60
+    ) as client:
+        response = await client.post(
+            "/api/v1/login",
+            data={"username": seeding.ADMIN_EMAIL, "password": seeding.PASSWORD},
+        )
+        response.raise_for_status()
+        ctx.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for name in args.scenario or SCENARIOS:
+            requests = min(args.requests, LIGHT_SCENARIOS.get(name, args.requests))
+            results[name] = await run_scenario(
+                client=client,
+                ctx=ctx,
+                scenario=SCENARIOS[name],
+                requests=requests,
+                concurrency=1 if name in SERIAL_SCENARIOS else args.concurrency,
+            )
+            print(f"{name:<24}", json.dumps(results[name]))
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(report: dict, results_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(
+        results_dir,
+        f"{report['name']}-{report['commit'] or 'nocommit'}-"
+        f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.json",
+    )
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+async def _noop_send_email(**kwargs) -> None:
+    pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", action="store_true", help="seed the database first")
+    seeding.add_arguments(parser)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--base-url", help="running server, in-process by default")
+    parser.add_argument("--output", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    volumes = None
+    if args.seed:
+        seeding.create_schema()
+        volumes = seeding.seed(
+            users=args.users,
+            products=args.products,
+            orders=args.orders,
+            products_per_order=args.products_per_order,
+        )
+        print("[OK] Seeded:", volumes)
+
+    with mock.patch("apps.market_api.v1.resources.order.send_email", _noop_send_email):
+        results = asyncio.run(run(args))
+
+    path = save_results(
+        {
+            "name": "load_test",
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": engine.dialect.name,
+            "volumes": volumes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "target": args.base_url or "in-process",
+            "results": results,
+        },
+        results_dir=args.output,
+    )
+    print("[OK] Results saved:", path)
@@ -0,0 +1,243 @@
+"""
+Microbenchmarks of provider and service hot paths.
+
+Every benchmark runs at several sizes (page size, products per order or
+serialized items) against a seeded database and reports latency and the
+number of SQL queries per call, so N+1 queries and scaling show up as
+numbers:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.micro --seed --sizes 10 100 1000
+
+Each call gets a fresh session, like a request does. Rows changed by a call
+are created by an untimed setup step before it, the serialize benchmarks
+load their rows there too and only time the pydantic validation and dump.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from apps.market_api import providers, services
+from apps.market_api.models import Order, Product, User
+from apps.market_api.schema import OrderSchema, PaginatedResponse
+from apps.market_api.schema import Product as ProductSchema
+from benchmarks import seed as seeding
+from benchmarks.load_test import RESULTS_DIR, git_commit, save_results
+from database import QueryStats, SessionLocal, engine, query_stats
+
+
+class Context:
+    """Seeded rows shared by the benchmarks"""
+
+    def __init__(self):
+        db = SessionLocal()
+        self.users = [uuid for (uuid,) in db.query(User.uuid)]
+        self.products = [uuid for (uuid,) in db.query(Product.uuid)]
+        db.close()
+
+    def user(self):
+        return random.choice(self.users)
+
+    def sample_products(self, size: int):
+        return random.sample(self.products, min(size, len(self.products)))
+
+    def create_order(self, size: int):
+        """Untimed setup, an order with `size` products"""
+        db = SessionLocal()
+        order = providers.create_user_order_with_products(
+            user_uuid=self.user(), product_uuids=self.sample_products(size), db=db
+        )
+        order_uuid = order.uuid
+        db.close()
+        return order_uuid
+
+
+def bench_paginate_products(ctx, size):
+    def run(db):
+        providers.get_paginated_data_by_query(
+            query=providers.get_products(db=db), page_size=size, page_num=2
+        )
+
+    return run
+
+
+def bench_paginate_user_orders(ctx, size):
+    user_uuid = ctx.user()
+
+    def run(db):
+        providers.get_paginated_data_by_query(
+            query=providers.get_user_orders_by_user_uuid(user_uuid=user_uuid, db=db),
+            page_size=size,
+        )
+
+    return run
+
+
+def bench_create_user_order_with_products(ctx, size):
+    user_uuid, product_uuids = ctx.user(), ctx.sample_products(size)
+
+    def run(db):
+        providers.create_user_order_with_products(
+            user_uuid=user_uuid, product_uuids=product_uuids, db=db
+        )
+
+    return run
+
+
+def bench_add_order_products(ctx, size):
+    order_uuid, product_uuids = ctx.create_order(1), ctx.sample_products(size)
+
+    def run(db):
+        services.add_order_products(
+            order_uuid=order_uuid, product_uuids=product_uuids, db=db
+        )
+
+    return run
+
+
+def bench_delete_order_products(ctx, size):
+    order_uuid = ctx.create_order(size + 1)
+    db = SessionLocal()
+    product_uuids = [
+        detail.product_uuid
+        for detail in providers.get_order_products_by_order_uuid(order_uuid, db=db)
+    ][:size]
+    db.close()
+
+    def run(db):
+        services.delete_order_products(
+            order_uuid=order_uuid, product_uuids=product_uuids, db=db
+        )
+
+    return run
+
+
+def bench_update_order_status(ctx, size):
+    order_uuid = ctx.create_order(size)
+
+    def run(db):
+        services.update_order_status(
+            order_uuid=order_uuid, update_status="IN_PROGRESS", db=db
+        )
+
+    return run
+
+
+def _serialize(schema, query, size: int):
+    """Untimed setup, a page of rows and the relationships the schema reads"""
+    db = SessionLocal()
+    data = providers.get_paginated_data_by_query(query=query(db), page_size=size)
+    schema.model_validate(data)
+    db.close()
+
+    def run(db):
+        schema.model_validate(data).model_dump_json()
+
+    return run
+
+
+def bench_serialize_products(ctx, size):
+    return _serialize(
+        PaginatedResponse[ProductSchema], lambda db: providers.get_products(db=db), size
+    )
+
+
+def bench_serialize_orders(ctx, size):
+    return _serialize(PaginatedResponse[OrderSchema], lambda db: db.query(Order), size)
+
+
+BENCHMARKS = {
+    "get_paginated_data_by_query[products]": bench_paginate_products,
+    "get_paginated_data_by_query[user_orders]": bench_paginate_user_orders,
+    "create_user_order_with_products": bench_create_user_order_with_products,
+    "add_order_products": bench_add_order_products,
+    "delete_order_products": bench_delete_order_products,
+    "update_order_status": bench_update_order_status,
+    "serialize[PaginatedResponse[Product]]": bench_serialize_products,
+    "serialize[PaginatedResponse[OrderSchema]]": bench_serialize_orders,
+}
+
+
+def measure(ctx, benchmark, size: int, iterations: int) -> dict:
+    """
+    Run `iterations` calls, each one prepared by its own setup
+    :return: dict latency in ms and queries per call
+    """
+    latencies = []
+    queries = []
+    errors = {}
+
+    for _ in range(iterations):
+        run = benchmark(ctx, size)
+        db = SessionLocal()
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            run(db)
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        finally:
+            latencies.append(time.perf_counter() - started)
+            query_stats.reset(token)
+            db.close()
+        queries.append(stats.count)
+
+    return {
+        "size": size,
+        "calls": iterations,
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(
+            statistics.quantiles(latencies, n=20, method="inclusive")[-1] * 1000, 2
+        ),
+        "queries_per_call": round(statistics.fmean(queries), 1),
+        "max_queries": max(queries),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", action="store_true", help="seed the database first")
+    seeding.add_arguments(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--benchmark", action="append", choices=list(BENCHMARKS))
+    parser.add_argument("--output", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    volumes = None
+    if args.seed:
+        seeding.create_schema()
+        volumes = seeding.seed(
+            users=args.users,
+            products=max(args.products, max(args.sizes) + 1),
+            orders=max(args.orders, max(args.sizes)),
+            products_per_order=args.products_per_order,
+        )
+        print("[OK] Seeded:", volumes)
+
+    random.seed(0)
+    ctx = Context()
+    results = {}
+    for name in args.benchmark or BENCHMARKS:
+        for size in args.sizes:
+            key = f"{name}@{size}"
+            results[key] = measure(ctx, BENCHMARKS[name], size, args.iterations)
+            print(f"{key:<48}", results[key])
+
+    path = save_results(
+        {
+            "name": "micro",
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": engine.dialect.name,
+            "volumes": volumes,
+            "iterations": args.iterations,
+            "results": results,
+        },
+        results_dir=args.output,
+    )
+    print("[OK] Results saved:", path)
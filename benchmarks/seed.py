@@ -0,0 +1,160 @@
+"""
+Seed a database with synthetic users, products and orders for benchmarks.
+
+Point DATABASE_URL to a disposable database: a local Postgres migrated with
+`alembic upgrade head`, or a SQLite file (its schema is created here) for
+relative numbers:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --orders 20000
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from apps.auth import utils
+from apps.market_api import services
+from apps.market_api.models import (
+    Group,
+    Order,
+    OrderDetail,
+    PasswordHistory,
+    Product,
+    User,
+    utcnow,
+    uuid7,
+)
+from database import Base, SessionLocal, engine
+
+ADMIN_EMAIL = "bench-admin@example.com"
+PASSWORD = "bench-password"
+BATCH_SIZE = 5000
+
+
+def create_schema() -> None:
+    """SQLite only, Postgres schemas come from the migrations"""
+    if engine.dialect.name == "sqlite":
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+
+def _catalog(products: int):
+    for i in range(products):
+        yield {
+            "name": f"Product {i}",
+            "sku": f"BENCH-{i:08d}",
+            "brand": f"Brand {i % 500}",
+            "category": f"Category {i % 40}",
+            "description": "benchmark product",
+            "unit": 1,
+            "unit_size": 1,
+            "weight": 1,
+            "price": round(random.uniform(1, 100), 2),
+        }
+
+
+def _insert_in_batches(db, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.bulk_insert_mappings(model, rows[start : start + BATCH_SIZE])
+        db.commit()
+
+
+def seed(
+    users: int = 100,
+    products: int = 1000,
+    orders: int = 2000,
+    products_per_order: int = 3,
+) -> dict:
+    """
+    Insert the given volumes. Every user shares PASSWORD and the first one is
+    the admin ADMIN_EMAIL. All orders are left PREPARING_FOR_DELIVERY so every
+    endpoint (status updates, deletes) can use them
+    :return: dict volumes and elapsed seconds
+    """
+    random.seed(0)
+    started = time.perf_counter()
+    db = SessionLocal()
+
+    admin_group = Group(name="admin")
+    db.add_all([admin_group, Group(name="customer")])
+    db.commit()
+
+    password = utils.get_password_hash(password=PASSWORD)
+    user_rows = [
+        {
+            "uuid": uuid.uuid4(),
+            "first_name": f"User{i}",
+            "last_name": "Bench",
+            "phone_number": 5550000 + i,
+            "email": ADMIN_EMAIL if i == 0 else f"user{i}@example.com",
+            "group_id": admin_group.id if i == 0 else None,
+        }
+        for i in range(users)
+    ]
+    _insert_in_batches(db, User, user_rows)
+    _insert_in_batches(
+        db,
+        PasswordHistory,
+        [{"user_uuid": row["uuid"], "password": password} for row in user_rows],
+    )
+
+    services.import_catalog(records=_catalog(products), batch_size=BATCH_SIZE, db=db)
+    catalog = db.query(Product.uuid, Product.price).all()
+
+    order_rows = []
+    detail_rows = []
+    for _ in range(orders):
+        created_at = utcnow()
+        order_uuid = uuid7(timestamp=created_at)
+        order_products = random.sample(catalog, products_per_order)
+        order_rows.append(
+            {
+                "uuid": order_uuid,
+                "user_uuid": random.choice(user_rows)["uuid"],
+                "delivery_status": "PREPARING_FOR_DELIVERY",
+                "total_receipt": sum(price for _, price in order_products),
+                "created_at": created_at,
+            }
+        )
+        detail_rows.extend(
+            {
+                "uuid": uuid7(timestamp=created_at),
+                "order_uuid": order_uuid,
+                "order_created_at": created_at,
+                "product_uuid": product_uuid,
+            }
+            for product_uuid, _ in order_products
+        )
+    _insert_in_batches(db, Order, order_rows)
+    _insert_in_batches(db, OrderDetail, detail_rows)
+    db.close()
+
+    return {
+        "users": users,
+        "products": products,
+        "orders": orders,
+        "products_per_order": products_per_order,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--products-per-order", type=int, default=3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    create_schema()
+    volumes = seed(
+        users=args.users,
+        products=args.products,
+        orders=args.orders,
+        products_per_order=args.products_per_order,
+    )
+    print("[OK] Seeded:", volumes)
@@ -1,95 +1,66 @@
-import json
-from datetime import datetime
+import uuid
 
 from sqlalchemy.exc import IntegrityError
 
 from apps.auth import utils
-from apps.market_api.models import (
-    Brand,
-    Category,
-    Group,
-    PasswordHistory,
-    Product,
-    User,
-)
+from apps.market_api import services
+from apps.market_api.catalog_import import iter_json_array, read_catalog
+from apps.market_api.models import Group, PasswordHistory, User
 from database import get_db
 
+DATA_FILE = "dummydata.json"
 
-def read_data():
-    with open("dummydata.json") as f:
-        data = json.load(f)
-        products = data["products"]
-        admin_users = data["users"]
 
-    return products, admin_users
+def read_users():
+    with open(DATA_FILE) as f:
+        yield from iter_json_array(f, key="users")
 
 
 def create_data():
     s = next(get_db())
-    products, users = read_data()
-    categories = {product["category"] for product in products}
 
-    # set user groups, product categories, product brands
+    # set user groups
     groups = [Group(name="admin"), Group(name="customer")]
-    categories = [
-        Category(name=category, created_at=datetime.now()) for category in categories
-    ]
-    brands = [
-        Brand(name=product["brand"], created_at=datetime.now()) for product in products
-    ]
-
     s.bulk_save_objects(groups)
-    s.bulk_save_objects(categories)
-    s.bulk_save_objects(brands)
 
     admin = s.query(Group).filter(Group.name == "admin").first().id
 
     # set users
-    for user in users:
-        u = User(
-            first_name=user["first_name"],
-            last_name=user["last_name"],
-            email=user["email"],
-            phone_number=user["phone_number"],
-            group_id=admin,
+    users = []
+    passwords = []
+    for user in read_users():
+        user_uuid = uuid.uuid4()
+        users.append(
+            {
+                "uuid": user_uuid,
+                "first_name": user["first_name"],
+                "last_name": user["last_name"],
+                "email": user["email"],
+                "phone_number": user["phone_number"],
+                "group_id": admin,
+            }
         )
-        s.add(u)
-        s.flush()
-
-        password_history = PasswordHistory(
-            user_uuid=u.uuid,
-            password=utils.get_password_hash(password=user["password"]),
+        passwords.append(
+            {
+                "user_uuid": user_uuid,
+                "password": utils.get_password_hash(password=user["password"]),
+            }
         )
-        s.add(password_history)
-
-    print("Admin User Created -> admin@admin.com:admin")
 
-    # set products
-    p = []
-    brand_qry = s.query(Brand).all()
-    category_qry = s.query(Category).all()
-    brand_uuids = {brand.name: brand.uuid for brand in brand_qry}
-    category_uuids = {category.name: category.uuid for category in category_qry}
+    s.bulk_insert_mappings(User, users)
+    s.bulk_insert_mappings(PasswordHistory, passwords)
+    s.commit()
 
-    for product in products:
-        p.append(
-            Product(
-                name=product["name"],
-                sku=product["sku"],
-                brand_uuid=brand_uuids.get(product["brand"]),
-                description=product["description"],
-                unit=product["unit"],
-                unit_size=product["unit_size"],
-                weight=product["weight"],
-                price=product["price"],
-                category_uuid=category_uuids.get(product["category"]),
-                created_at=datetime.now(),
-            )
-        )
+    print("Admin User Created -> admin@admin.com:admin")
 
-    s.bulk_save_objects(p)
-    s.commit()
-    print("[OK] Data Created")
+    # set products, product categories and product brands
+    stats = services.import_catalog(records=read_catalog(DATA_FILE), db=s)
+    print(
+        "[OK] Data Created ({products} products, {brands} brands, "
+        "{categories} categories in {seconds:.2f}s)".format(**stats)
+    )
+    if stats["skipped"]:
+        print("[WARN] {} rows skipped: {}".format(stats["skipped"], stats["errors"]))
 
 
 try:
@@ -1,17 +1,118 @@
-import os
+import itertools
+import sqlite3
+import time
+from contextvars import ContextVar
 
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
 
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-load_dotenv(".env")
-engine = create_engine(url=os.environ["DATABASE_URL"])
+from apps.monitoring import slow_queries, tracing
+from settings import get_settings
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+settings = get_settings()
+
+
+def _pool_options(url: str) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite (tests, benchmarks) only enforces foreign keys, and so ON DELETE
+    # CASCADE, when asked to on every connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+engine = create_engine(
+    url=settings.database_url, **_pool_options(settings.database_url)
+)
+replica_engines = [
+    create_engine(url=url, **_pool_options(url))
+    for url in settings.database_replica_urls
+]
+
+# objects keep their state after commit, the services already hold what
+# they wrote and don't need it reloaded
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+
+def _read_only_sessionmaker(bind) -> sessionmaker:
+    read_only_sessions = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=bind
+    )
+    event.listen(read_only_sessions, "after_begin", set_transaction_read_only)
+    return read_only_sessions
+
+
+def set_transaction_read_only(session, transaction, connection):
+    # lets Postgres skip transaction id assignment and refuse accidental writes
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+ReadOnlySessionLocal = _read_only_sessionmaker(engine)
+replica_sessions = [
+    _read_only_sessionmaker(replica_engine) for replica_engine in replica_engines
+]
+_replica_counter = itertools.count()
 
 Base = declarative_base()
 
+QUERY_COUNT_THRESHOLD = settings.query_count_threshold
+READ_YOUR_WRITES_SECONDS = settings.replica_read_your_writes_seconds
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+class ClientWrites:
+    """
+    When the current client last committed a write, in epoch seconds so any
+    worker or server can tell. The request middleware reads it from and
+    writes it back to the LAST_WRITE_COOKIE cookie
+    """
+
+    def __init__(self, last_write_at: float | None = None):
+        self.last_write_at = last_write_at
+        self.wrote = False
+
+    @classmethod
+    def from_cookie(cls, value: str | None) -> "ClientWrites":
+        try:
+            return cls(float(value))
+        except (TypeError, ValueError):
+            return cls()
+
+    @property
+    def recent(self) -> bool:
+        return (
+            self.last_write_at is not None
+            and time.time() - self.last_write_at < READ_YOUR_WRITES_SECONDS
+        )
+
+    def record(self) -> None:
+        self.last_write_at = time.time()
+        self.wrote = True
+
+
+client_writes: ContextVar[ClientWrites | None] = ContextVar(
+    "client_writes", default=None
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -19,3 +120,137 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Read-only session for GET endpoints, on the replicas (round robin) when
+    DATABASE_REPLICA_URLS is set. A client that committed a write in the last
+    READ_YOUR_WRITES_SECONDS reads from the primary instead, so it sees its
+    own changes in spite of replication lag
+    """
+    writes = client_writes.get()
+    if not replica_sessions or (writes is not None and writes.recent):
+        db = ReadOnlySessionLocal()
+    else:
+        db = replica_sessions[next(_replica_counter) % len(replica_sessions)]()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def after_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def do_orm_execute(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def after_commit(session):
+    writes = client_writes.get()
+    if not session.info.pop("wrote", False) or writes is None:
+        return
+    writes.record()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def after_rollback(session):
+    session.info.pop("wrote", None)
+
+
+class QueryStats:
+    """SQL statements executed while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+
+        if duration > self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+    @property
+    def exceeds_threshold(self) -> bool:
+        return self.count > QUERY_COUNT_THRESHOLD
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_duration * 1000:.2f}"
+        )
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    if tracing.enabled:
+        operation = statement.split(None, 1)[0].upper() if statement else ""
+        span = tracing.tracer.start_span(
+            f"db.{operation}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": conn.dialect.name,
+                "db.operation": operation,
+                "db.statement": statement,
+            },
+        )
+        conn.info.setdefault("query_spans", []).append(span)
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = query_stats.get()
+
+    if stats is not None:
+        stats.record(statement=statement, duration=duration)
+
+    if duration >= slow_queries.SLOW_QUERY_THRESHOLD:
+        slow_queries.capture(
+            engine=conn.engine,
+            statement=statement,
+            parameters=parameters,
+            duration=duration,
+            executemany=executemany,
+        )
+
+    if conn.info.get("query_spans"):
+        conn.info["query_spans"].pop().end()
+
+
+def handle_error(exception_context):
+    # only statements that failed after before_cursor_execute ran
+    conn = exception_context.connection
+    if conn is None or exception_context.cursor is None:
+        return
+    if exception_context.statement is None:
+        return
+
+    if conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+    if conn.info.get("query_spans"):
+        span = conn.info["query_spans"].pop()
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+
+for instrumented_engine in (engine, *replica_engines):
+    event.listen(instrumented_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(instrumented_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(instrumented_engine, "handle_error", handle_error)
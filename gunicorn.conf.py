@@ -0,0 +1,59 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+    gunicorn main:app -c gunicorn.conf.py
+
+Settings come from settings.py (environment variables or .env) and can be
+overridden on the command line. uvicorn picks uvloop and httptools when they
+are installed.
+"""
+
+import os
+import shutil
+
+from settings import get_settings
+
+settings = get_settings()
+
+# one single-threaded event loop per core, sync endpoints run in each
+# worker's thread pool
+workers = settings.web_concurrency
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = settings.bind
+
+# import the app once in the master, workers fork with it already loaded
+preload_app = True
+
+backlog = settings.backlog
+keepalive = settings.keepalive
+# seconds a silent worker is allowed before it is restarted
+timeout = settings.worker_timeout
+# on SIGTERM workers stop accepting connections and get this long to drain
+graceful_timeout = settings.graceful_timeout
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
+
+accesslog = settings.access_log
+
+# workers share their Prometheus metrics through files in this directory.
+# It has to exist before the app (and prometheus_client) is preloaded, which
+# happens right after this file is read
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc"
+)
+shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+os.makedirs(prometheus_multiproc_dir)
+
+
+def post_fork(server, worker):
+    # connections opened by the master while importing the app must not be
+    # shared with the workers
+    from database import engine, replica_engines
+
+    for worker_engine in (engine, *replica_engines):
+        worker_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
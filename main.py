@@ -1,14 +1,43 @@
-import uvicorn
-from dotenv import load_dotenv
-from fastapi import FastAPI
+import json
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+from fastapi import FastAPI, Request
 
 from apps.auth import auth
 from apps.market_api.v1.resources import product, user_order
-from apps.market_api.v1.resources import order_product, user, order
+from apps.market_api.v1.resources import order_product, user, order, admin_order
+from apps.monitoring import metrics, profiler, tracing
+from apps.monitoring import router as monitoring
+from database import (
+    LAST_WRITE_COOKIE,
+    READ_YOUR_WRITES_SECONDS,
+    ClientWrites,
+    QueryStats,
+    client_writes,
+    query_stats,
+)
+from settings import get_settings
+
+tracing.setup_tracing()
+
+logger = logging.getLogger("market_api.requests")
 
-load_dotenv(".env")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # sync endpoints and dependencies share this pool, each holding a DB
+    # connection while it runs
+    to_thread.current_default_thread_limiter().total_tokens = (
+        get_settings().threadpool_size
+    )
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.include_router(auth.router)
@@ -17,7 +46,73 @@ app.include_router(order_product.router)
 app.include_router(product.router)
 app.include_router(user.router)
 app.include_router(user_order.router)
+app.include_router(admin_order.router)
+app.include_router(monitoring.router)
+app.include_router(monitoring.admin_router)
+
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    writes = ClientWrites.from_cookie(request.cookies.get(LAST_WRITE_COOKIE))
+    client_writes_token = client_writes.set(writes)
+    started_at = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.inc()
+    request_profile = profiler.request_profile
+    profiled = request_profile is not None and request_profile.claim(request.scope)
+    with tracing.server_span(request.method, request.headers) as span:
+        try:
+            response = await call_next(request)
+        finally:
+            query_stats.reset(token)
+            client_writes.reset(client_writes_token)
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            if profiled:
+                request_profile.release()
+
+        route = metrics.route_template(request.scope)
+        span.update_name(f"HTTP {request.method} {route}")
+        span.set_attribute("http.route", route)
+        span.set_attribute("http.response.status_code", response.status_code)
+
+    duration = time.perf_counter() - started_at
+    metrics.REQUEST_LATENCY.labels(
+        method=request.method, route=route, status_code=response.status_code
+    ).observe(duration)
+    response.headers["Server-Timing"] = (
+        f"{stats.server_timing()}, app;dur={duration * 1000:.2f}"
+    )
+    if writes.wrote:
+        # the client's next reads go to the primary, whichever worker serves them
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{writes.last_write_at:.3f}",
+            max_age=math.ceil(READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+
+    log = logger.warning if stats.exceeds_threshold else logger.info
+    log(
+        json.dumps(
+            {
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "query_count": stats.count,
+                "query_duration_ms": round(stats.duration * 1000, 2),
+                "slowest_query_ms": round(stats.slowest_duration * 1000, 2),
+                "slowest_query": stats.slowest_statement,
+                "query_count_exceeded": stats.exceeds_threshold,
+            }
+        )
+    )
+    return response
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,84 @@
+"""
+Application settings, read once per process from the environment and .env.
+
+Every deployment knob lives here, so it can be tuned per environment
+without code changes. Variable names are the upper case field names, e.g.
+DB_POOL_SIZE=20 or BCRYPT_ROUNDS=10.
+"""
+
+import os
+from functools import lru_cache
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# .env is next to this file, wherever the process (alembic, gunicorn, the
+# CLIs) is started from
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=ENV_FILE, extra="ignore")
+
+    # database
+    database_url: str
+    # JSON list, e.g. ["postgresql://...@replica-1/market"]
+    database_replica_urls: list[str] = []
+    # after a write, a client reads from the primary for this long
+    replica_read_your_writes_seconds: float = Field(5, ge=0)
+    db_pool_size: int = Field(5, ge=1)
+    db_max_overflow: int = Field(10, ge=0)
+    db_pool_timeout: float = Field(30, gt=0)
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = False
+    query_count_threshold: int = 20
+
+    # auth
+    oauth2_secret_key: str
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = Field(30, ge=1)
+    bcrypt_rounds: int = Field(12, ge=4, le=31)
+
+    # mail
+    mail_username: str | None = None
+    mail_password: str | None = None
+    mail_from: str | None = None
+    mail_port: int = 587
+    mail_server: str | None = None
+    mail_from_name: str | None = None
+
+    # server, see gunicorn.conf.py
+    web_concurrency: int = Field(default_factory=lambda: os.cpu_count() or 1, ge=1)
+    bind: str = "0.0.0.0:8000"
+    backlog: int = 2048
+    keepalive: int = 5
+    worker_timeout: int = 60
+    graceful_timeout: int = 30
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    access_log: str = "-"
+    # threads running sync endpoints and dependencies, per worker
+    threadpool_size: int = Field(40, ge=1)
+
+    # orders
+    order_archive_dir: str = "archive"
+
+    # paginated totals, see apps/market_api/total_counts.py
+    total_count_ttl_seconds: float = Field(30, ge=0)
+    total_count_exact_threshold: int = Field(10000, ge=0)
+
+    # monitoring
+    slow_query_threshold_ms: float = 200
+    slow_query_sample_rate: float = Field(1, ge=0, le=1)
+    slow_query_max_per_minute: int = 10
+    slow_query_explain: bool = True
+    slow_query_log_file: str = "slow_queries.log"
+    tracing_exporter: Literal["none", "otlp", "file"] = "none"
+    tracing_file: str = "traces.jsonl"
+    otel_service_name: str = "market-api"
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()